@@ -0,0 +1,122 @@
+"""Micro-benchmark for the course formatters.
+
+Compares the working tree's ``formatting.py`` with the one at a baseline git
+revision: full ``format_course`` rendering of a department, and building a
+search-results page of N summaries (the old handlers did ``out += ...`` per
+course; the current ones write into a shared TextWriter). Reports the time
+per course at growing sizes so non-linear scaling is easy to spot.
+
+Usage: python benchmarks/formatting.py --baseline REV [--sizes 100,400,1600,6400] [--repeat 5]
+
+REV is the revision to compare with, e.g. the commit before the change being
+measured; there is no default, as comparing the tree with its own HEAD is
+meaningless.
+"""
+
+import argparse
+import gzip
+import importlib.util
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from tools.course_catalog import formatting as current  # noqa: E402
+from tools.course_catalog.parsing import parse_courses  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_baseline(rev: str) -> ModuleType:
+    source = subprocess.check_output(
+        ["git", "show", f"{rev}:src/tools/course_catalog/formatting.py"], cwd=ROOT, text=True
+    )
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as fh:
+        fh.write(source)
+    try:
+        spec = importlib.util.spec_from_file_location("baseline_formatting", fh.name)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.unlink(fh.name)
+    return module
+
+
+def load_courses(n: int) -> List[Any]:
+    pool: List[Any] = []
+    for path in sorted(FIXTURES.glob("dept_*.xml.gz")):
+        with gzip.open(path, "rb") as fh:
+            pool.extend(parse_courses(fh.read()))
+    return list(itertools.islice(itertools.cycle(pool), n))
+
+
+def page_concat(module: ModuleType, courses: List[Any]) -> str:
+    out = "Results:"
+    for c in courses:
+        out += "\n\n" + module.format_course_summary(c)
+    return out
+
+
+def page_writer(module: ModuleType, courses: List[Any]) -> str:
+    w = module.TextWriter()
+    w.write("Results:")
+    for c in courses:
+        w.write("\n\n")
+        module.write_course_summary(w, c)
+    return w.getvalue()
+
+
+def full_courses(module: ModuleType, courses: List[Any]) -> str:
+    return "\n".join(module.format_course(c) for c in courses)
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", required=True, help="git revision to compare against (e.g. the pre-change commit)")
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=[100, 400, 1600, 6400])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    has_writer = hasattr(baseline, "TextWriter")
+    results: Dict[str, Any] = {"baseline": args.baseline, "sizes": {}}
+
+    for n in args.sizes:
+        courses = load_courses(n)
+        base_page = (lambda: page_writer(baseline, courses)) if has_writer else (lambda: page_concat(baseline, courses))
+        row = {
+            "search_page_baseline_ms": best_of(base_page, args.repeat) * 1000,
+            "search_page_current_ms": best_of(lambda: page_writer(current, courses), args.repeat) * 1000,
+            "format_course_baseline_ms": best_of(lambda: full_courses(baseline, courses), args.repeat) * 1000,
+            "format_course_current_ms": best_of(lambda: full_courses(current, courses), args.repeat) * 1000,
+        }
+        row = {k: round(v, 3) for k, v in row.items()}
+        row["format_course_us_per_course"] = round(row["format_course_current_ms"] * 1000 / n, 2)
+        row["format_course_speedup"] = round(row["format_course_baseline_ms"] / row["format_course_current_ms"], 2)
+        row["search_page_speedup"] = round(row["search_page_baseline_ms"] / row["search_page_current_ms"], 2)
+        results["sizes"][n] = row
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Micro-benchmark for the ExploreCourses XML parsers.
+
+Compares the old tree-based path (``ET.fromstring`` + ``explorecourses`` Course
+objects converted to records) with the streaming parser in full and summary
+mode, on a response built by repeating the department fixtures. Reports best
+wall time and tracemalloc peak for each.
+
+Usage: python benchmarks/parsing.py [--copies 1,4,16] [--repeat 5]
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from explorecourses.classes import Course  # noqa: E402
+
+from tools.course_catalog.parsing import parse_courses  # noqa: E402
+from tools.course_catalog.records import (  # noqa: E402
+    AttributeRecord,
+    CourseRecord,
+    InstructorRecord,
+    ObjectiveRecord,
+    ScheduleRecord,
+    SectionRecord,
+    TagRecord,
+    intern,
+    share,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+# The old tree path: explorecourses objects converted field by field
+def _instructor(i: Any, year: Optional[str]) -> InstructorRecord:
+    return share(InstructorRecord(
+        intern(i.name), intern(i.first_name), intern(i.middle_name), intern(i.last_name), intern(i.sunet_id),
+        i.is_primary_instructor,
+    ), year)
+
+
+def _attribute(a: Any, year: Optional[str]) -> AttributeRecord:
+    return share(
+        AttributeRecord(intern(a.name), intern(a.value), intern(a.description), a.catalog_print, a.schedule_print), year
+    )
+
+
+def _schedule(s: Any, year: Optional[str]) -> ScheduleRecord:
+    return ScheduleRecord(
+        intern(s.start_date), intern(s.end_date), intern(s.start_time), intern(s.end_time), intern(s.location),
+        share(tuple(intern(d) for d in s.days), year),
+        share(tuple(_instructor(i, year) for i in s.instructors), year),
+    )
+
+
+def _section(sec: Any, year: Optional[str]) -> SectionRecord:
+    return SectionRecord(
+        sec.class_id, intern(sec.term), intern(sec.units), intern(sec.section_num), intern(sec.component),
+        sec.curr_class_size, sec.max_class_size, sec.curr_waitlist_size, sec.max_waitlist_size,
+        sec.notes,
+        tuple(_schedule(s, year) for s in sec.schedules),
+        share(tuple(_attribute(a, year) for a in sec.attributes), year),
+    )
+
+
+def from_course(course: Any) -> CourseRecord:
+    """Convert an ``explorecourses.classes.Course`` into a CourseRecord."""
+
+    year = intern(course.year)
+    return CourseRecord(
+        course_id=course.course_id,
+        year=year,
+        subject=intern(course.subject),
+        code=intern(course.code),
+        title=course.title,
+        description=course.description,
+        gers=share(tuple(intern(g) for g in course.gers), year),
+        repeatable=course.repeatable,
+        grading_basis=intern(course.grading_basis),
+        units_min=course.units_min,
+        units_max=course.units_max,
+        final_exam=course.final_exam,
+        active=course.active,
+        offer_num=intern(course.offer_num),
+        academic_group=intern(course.academic_group),
+        academic_org=intern(course.academic_org),
+        academic_career=intern(course.academic_career),
+        max_units_repeat=course.max_units_repeat,
+        max_times_repeat=course.max_times_repeat,
+        objectives=share(
+            tuple(share(ObjectiveRecord(intern(o.code), o.description), year) for o in course.objectives), year
+        ),
+        tags=share(tuple(share(TagRecord(intern(t.organization), intern(t.name)), year) for t in course.tags), year),
+        attributes=share(tuple(_attribute(a, year) for a in course.attributes), year),
+        sections=tuple(_section(sec, year) for sec in course.sections),
+    )
+
+
+def build_response(copies: int) -> bytes:
+    courses: List[bytes] = []
+    for path in sorted(FIXTURES.glob("dept_*.xml.gz")):
+        with gzip.open(path, "rb") as fh:
+            courses.extend(ET.tostring(e) for e in ET.fromstring(fh.read()).iter("course"))
+    body = b"".join(courses) * copies
+    return b'<?xml version="1.0" encoding="UTF-8"?><xml><courses>' + body + b"</courses></xml>"
+
+
+def tree_parse(content: bytes) -> List[Any]:
+    return [from_course(Course(e)) for e in ET.fromstring(content).findall(".//course")]
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": round(best * 1000, 2), "peak_mb": round(peak / 1e6, 2)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=lambda s: [int(x) for x in s.split(",")], default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = {}
+    for copies in args.copies:
+        content = build_response(copies)
+        results[f"x{copies}"] = {
+            "response_mb": round(len(content) / 1e6, 2),
+            "tree": measure(lambda: tree_parse(content), args.repeat),
+            "stream_full": measure(lambda: parse_courses(content), args.repeat),
+            "stream_summary": measure(lambda: parse_courses(content, summary=True), args.repeat),
+        }
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Record ExploreCourses responses into ``benchmarks/fixtures`` for replay.
+
+Usage: python benchmarks/record_fixtures.py [--year 2025-2026] [--dept CS --dept MATH ...] [--query "machine learning" ...]
+"""
+
+import argparse
+import gzip
+import sys
+from pathlib import Path
+
+import httpx
+
+FIXTURES = Path(__file__).parent / "fixtures"
+URL = "https://explorecourses.stanford.edu/"
+VIEW = "xml-20200810"
+
+
+def _save(name: str, content: bytes) -> None:
+    with gzip.open(FIXTURES / name, "wb") as fh:
+        fh.write(content)
+    print(f"recorded {name} ({len(content)} bytes)")
+
+
+def _search(client: httpx.Client, query: str, year: str, *filters: str) -> bytes:
+    params = {"view": VIEW, "filter-coursestatus-Active": "on", "q": query, "academicYear": year.replace("-", "")}
+    params.update({f: "on" for f in filters})
+    res = client.get(URL + "search", params=params)
+    res.raise_for_status()
+    return res.content
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", default="2025-2026")
+    parser.add_argument("--dept", action="append", default=None)
+    parser.add_argument("--query", action="append", default=None)
+    args = parser.parse_args()
+
+    FIXTURES.mkdir(exist_ok=True)
+    with httpx.Client(timeout=60.0, follow_redirects=True) as client:
+        res = client.get(URL, params={"view": VIEW, "year": args.year.replace("-", "")})
+        res.raise_for_status()
+        _save("schools.xml.gz", res.content)
+
+        for code in args.dept or ["CS", "MATH", "EE"]:
+            _save(f"dept_{code}.xml.gz", _search(client, code, args.year, f"filter-departmentcode-{code}"))
+
+        for query in args.query or ["machine learning", "intro", "calculus", "programming"]:
+            _save(f"query_{'_'.join(query.lower().split())}.xml.gz", _search(client, query, args.year))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Local stand-in for ExploreCourses that replays recorded XML responses.
+
+Fixtures live in ``benchmarks/fixtures`` (see ``record_fixtures.py``):
+
+- ``schools.xml.gz``: response for the school/department listing
+- ``dept_<CODE>.xml.gz``: search response for one department
+- ``query_<query>.xml.gz``: search response for a free-text query, with
+  spaces replaced by underscores
+
+Numeric queries (how get-course looks up a course_id) are answered with the
+matching course taken from the department fixtures. Anything else gets an
+empty result set.
+"""
+
+import gzip
+import threading
+import time
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+_EMPTY = b'<?xml version="1.0" encoding="UTF-8"?><xml><courses></courses></xml>'
+
+
+def _read(path: Path) -> bytes:
+    with gzip.open(path, "rb") as fh:
+        return fh.read()
+
+
+def _wrap(courses: List[bytes]) -> bytes:
+    return b'<?xml version="1.0" encoding="UTF-8"?><xml><courses>' + b"".join(courses) + b"</courses></xml>"
+
+
+class ReplayServer:
+    """Threaded HTTP server serving fixtures, with optional simulated latency."""
+
+    def __init__(self, fixtures: Path = FIXTURES, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self.schools = _read(fixtures / "schools.xml.gz")
+        self.departments: Dict[str, bytes] = {
+            p.name[len("dept_"):-len(".xml.gz")]: _read(p) for p in fixtures.glob("dept_*.xml.gz")
+        }
+        self.queries: Dict[str, bytes] = {
+            p.name[len("query_"):-len(".xml.gz")]: _read(p) for p in fixtures.glob("query_*.xml.gz")
+        }
+        self.courses: Dict[str, bytes] = {}
+        for xml in self.departments.values():
+            for elem in ET.fromstring(xml).iter("course"):
+                self.courses[elem.findtext(".//courseId")] = ET.tostring(elem)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def course_ids(self) -> List[int]:
+        return sorted(int(cid) for cid in self.courses)
+
+    def respond(self, path: str, params: Dict[str, List[str]]) -> bytes:
+        if path in ("", "/"):
+            return self.schools
+        q = (params.get("q") or [""])[0]
+        for name in params:
+            if name.startswith("filter-departmentcode-"):
+                return self.departments.get(name[len("filter-departmentcode-"):], _EMPTY)
+        if q.isdigit():
+            course = self.courses.get(q)
+            return _wrap([course]) if course else _EMPTY
+        return self.queries.get("_".join(q.lower().split()), _EMPTY)
+
+    def start(self) -> str:
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                body = replay.respond(url.path, parse_qs(url.query, keep_blank_values=True))
+                replay.requests += 1
+                if replay.latency:
+                    time.sleep(replay.latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/xml; charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
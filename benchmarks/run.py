@@ -0,0 +1,172 @@
+"""Benchmark the MCP tool handlers against the local ExploreCourses replay server.
+
+Drives ``tools.registry.dispatch`` directly (no HTTP/MCP framing) for every
+registered tool at several concurrency levels, and prints a JSON report with
+per-tool latency percentiles, throughput and peak RSS. Runs fully offline.
+
+Usage: python benchmarks/run.py [--requests 200] [--concurrency 1,10,100] [--latency-ms 0] [--cold] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from replay import ReplayServer  # noqa: E402
+from tools import register_all_tools  # noqa: E402
+from tools.course_catalog.backends import get_cache_backend  # noqa: E402
+from tools.course_catalog.client import close_course_connection  # noqa: E402
+from tools.course_catalog.course_catalog import clear_caches  # noqa: E402
+from tools.course_catalog.settings import SETTINGS  # noqa: E402
+from tools.registry import dispatch, list_all_tools  # noqa: E402
+
+ALL_TERMS = ["Autumn", "Winter", "Spring", "Summer"]
+QUERIES = ["machine learning", "intro", "calculus", "programming", "Machine  Learning"]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def peak_rss_kb() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def scenarios(course_ids: List[int]) -> Dict[str, Callable[[random.Random], Dict[str, Any]]]:
+    return {
+        "list-schools": lambda rnd: {"include_department_count": rnd.random() < 0.5},
+        "list-departments": lambda rnd: {"school": rnd.choice(["", "School of Engineering"])},
+        "get-course": lambda rnd: {"course_id": rnd.choice(course_ids), "terms": ALL_TERMS},
+        "get-courses": lambda rnd: {"course_ids": rnd.sample(course_ids, 10), "terms": ALL_TERMS},
+        "search-courses": lambda rnd: {"query": rnd.choice(QUERIES), "terms": ALL_TERMS},
+    }
+
+
+async def run_level(tool: str, make_args: Callable, requests: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    rnd = random.Random(seed)
+    calls = [make_args(rnd) for _ in range(requests)]
+    latencies: List[float] = []
+    errors = 0
+    response_bytes = 0
+    next_call = iter(calls)
+
+    async def worker() -> None:
+        nonlocal errors, response_bytes
+        for args in next_call:
+            started = time.perf_counter()
+            try:
+                blocks = await dispatch(tool, args, None)
+                response_bytes += sum(len(getattr(b, "text", "")) for b in blocks)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda s: round(s * 1000, 3)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(requests / wall, 1) if wall else None,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p90": ms(percentile(latencies, 90)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]) if latencies else 0.0,
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        },
+        "avg_response_bytes": response_bytes // max(1, requests - errors),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    replay = ReplayServer(latency=args.latency_ms / 1000)
+    SETTINGS.explorecourses_url = replay.start()
+    register_all_tools()
+    tool_args = scenarios(replay.course_ids)
+
+    results: Dict[str, Any] = {}
+    try:
+        for tool in [t.name for t in list_all_tools()]:
+            if tool not in tool_args:
+                continue
+            results[tool] = {}
+            for level in args.concurrency:
+                if args.cold:
+                    clear_caches()
+                    backend = get_cache_backend()
+                    if backend is not None:
+                        backend.clear()
+                upstream_before = replay.requests
+                stats = await run_level(tool, tool_args[tool], args.requests, level, args.seed)
+                stats["upstream_requests"] = replay.requests - upstream_before
+                stats["peak_rss_kb"] = peak_rss_kb()
+                results[tool][f"c{level}"] = stats
+    finally:
+        await close_course_connection()
+        replay.stop()
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "requests_per_level": args.requests,
+            "concurrency": args.concurrency,
+            "upstream_latency_ms": args.latency_ms,
+            "cold": args.cold,
+        },
+        "results": results,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Calls per tool per concurrency level")
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 10, 100])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated upstream latency per request")
+    parser.add_argument("--cold", action="store_true", help="Clear catalog caches before every concurrency level")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,74 @@
+import asyncio
 from contextlib import asynccontextmanager
+import json
 import logging
 import os
 from typing import Any, AsyncIterator
 import click
-from mcp.server.lowlevel import Server
-from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
 from starlette.applications import Starlette
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import RedirectResponse, JSONResponse
+from starlette.responses import RedirectResponse, JSONResponse, PlainTextResponse
 from starlette.types import Receive, Scope, Send
 from starlette.routing import Mount, Route
 from starlette.config import Config
 import uvicorn
 
 from auth import require_bearer_token
-from helpers import return_tools
+from metrics import render as render_metrics
+import tracing
+from workers import current_worker_slot, serve_prefork
 from tools import register_all_tools
-import mcp.types as types
+from tools.registry import load_tools
 
-from tools.registry import dispatch, list_all_tools
-from tools.course_catalog.course_catalog import reset_course_connection_cache
+from tools.course_catalog.backends import close_cache_backend
+from tools.course_catalog.settings import ACADEMIC_YEAR, SETTINGS, load_settings
+from tools.course_catalog.warmup import WARMUP_STATUS, warm_up
+
+# Keep this module's imports light: everything imported here runs before
+# uvicorn can listen. The MCP stack (mcp_app) and the catalog tool modules
+# load in the background once it does; see LazyMCP.
 
 logger = logging.getLogger(__name__)
 
+
+def _build_mcp() -> Any:
+    from mcp_app import build_session_manager
+
+    return build_session_manager()
+
+
+class LazyMCP:
+    """ASGI app for /mcp whose MCP session manager is loaded by `run()`.
+
+    Requests that arrive while it is loading wait for it.
+    """
+
+    def __init__(self):
+        self.manager = None
+        self.loaded = asyncio.Event()
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Load the MCP stack in a worker thread and run its session manager until `stop` is set."""
+
+        try:
+            manager = await asyncio.to_thread(_build_mcp)
+        except Exception:
+            logger.exception("Failed to load the MCP server")
+            self.loaded.set()
+            raise
+        async with manager.run():
+            self.manager = manager
+            self.loaded.set()
+            logger.info("Application started with StreamableHTTP session manager")
+            await stop.wait()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.loaded.wait()
+        if self.manager is None:
+            response = JSONResponse({"detail": "MCP server failed to start"}, status_code=503)
+            return await response(scope, receive, send)
+        await self.manager.handle_request(scope, receive, send)
+
 # Setup basic CLI with variables passed on running script
 @click.command()
 @click.option(
@@ -40,9 +86,61 @@ logger = logging.getLogger(__name__)
     default=False,
     help="Enable debug mode (Starlette debug and Uvicorn reload)",
 )
+@click.option(
+    "--workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of worker processes; the warm catalog is loaded once and shared copy-on-write",
+)
+@click.option(
+    "--catalog-source",
+    type=click.Choice(["live", "snapshot"]),
+    default=None,
+    help="Answer search-courses from live ExploreCourses queries or the local snapshot (overrides CATALOG_SOURCE)",
+)
+@click.option(
+    "--trace-file",
+    default=None,
+    help="Record per-stage tracing spans for tool calls to this file as JSON lines (overrides TRACE_FILE)",
+)
+@click.option(
+    "--trace-sample-rate",
+    default=None,
+    type=click.FloatRange(0.0, 1.0),
+    help="Fraction of tool calls to trace when tracing is on (overrides TRACE_SAMPLE_RATE, default 1.0)",
+)
+@click.option(
+    "--refresh-snapshot",
+    is_flag=True,
+    default=False,
+    help="Download the full catalog to SNAPSHOT_PATH and exit",
+)
+@click.option(
+    "--sync-snapshot",
+    is_flag=True,
+    default=False,
+    help="Re-check every department in SNAPSHOT_PATH, save what changed, print the change report and exit",
+)
+@click.option(
+    "--profile-startup",
+    is_flag=True,
+    default=False,
+    help="Start the server under `python -X importtime`, report time to listening/ready and per-module import cost, and exit",
+)
 
 # Main method below
-def main(port: int, log_level: str, debug: bool):
+def main(
+    port: int,
+    log_level: str,
+    debug: bool,
+    workers: int,
+    catalog_source: str | None,
+    trace_file: str | None,
+    trace_sample_rate: float | None,
+    refresh_snapshot: bool,
+    sync_snapshot: bool,
+    profile_startup: bool,
+):
     
     # Configure logging
     logging.basicConfig(
@@ -50,67 +148,105 @@ def main(port: int, log_level: str, debug: bool):
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
     
+    if profile_startup:
+        from startup_profile import profile_startup as run_profile
+
+        return run_profile(port)
+    
     # Load config from .env
     config = Config(".env")
+    load_settings(config)
+    if catalog_source:
+        SETTINGS.catalog_source = catalog_source
+    
+    trace_file = trace_file or config("TRACE_FILE", cast=str, default=None)
+    if trace_sample_rate is None:
+        trace_sample_rate = config("TRACE_SAMPLE_RATE", cast=float, default=1.0)
+    if trace_file:
+        tracing.configure(trace_file, trace_sample_rate)
+        logger.info("Tracing %.0f%% of tool calls to %s", trace_sample_rate * 100, trace_file)
+    
+    if refresh_snapshot:
+        asyncio.run(_refresh_snapshot())
+        return 0
+    
+    if sync_snapshot:
+        _load_snapshot()
+        asyncio.run(_sync_snapshot())
+        return 0
+    
     api_auth_token = config("API_AUTH_TOKEN", cast=str, default=None)
     api_auth_header = config("API_AUTH_HEADER", cast=str, default="Authorization")
     if not api_auth_token:
         raise RuntimeError("API_AUTH_TOKEN is not set. Create an .env with API_AUTH_TOKEN")
     
-    app = Server("stanford-mcp")
-    
-    # Setup tool registry with app
-    register_all_tools()
+    if workers > 1 and debug:
+        raise click.UsageError("--workers cannot be combined with --debug (reload)")
     
-    # Log tools
-    logger.info("\n\n" + return_tools() + "\n\n")
+    # Load the snapshot before any worker is forked so all workers share it
+    if SETTINGS.catalog_source == "snapshot":
+        _load_snapshot()
     
-    @app.list_tools()
-    async def list_tools() -> list[types.Tool]:
-        return list_all_tools()
+    # Setup tool registry (tool modules are imported on first use)
+    register_all_tools()
     
-    @app.call_tool()
-    async def call_tool(name: str, arguments: dict[str, Any]) -> list[types.ContentBlock]:
-        ctx = app.request_context
-        return await dispatch(name, arguments, ctx)
+    # With several workers, import the MCP stack and tools once before forking
+    if workers > 1:
+        import mcp_app  # noqa: F401
+        load_tools()
     
-    # Create the session manager with stateless mode
-    session_manager = StreamableHTTPSessionManager(
-        app=app,
-        event_store=None,
-        json_response=False,
-        stateless=True
-    )
+    mcp_endpoint = LazyMCP()
     
-    # Define methods for Starlette app
-    async def handle_streamable_http(scope: Scope, receive: Receive, send: Send) -> None:
-        await session_manager.handle_request(scope, receive, send)
-        
     # Root redirect to github
     async def root_redirect(request):
         return RedirectResponse(url="https://github.com/markmusic27/stanford-mcp", status_code=307)
     
-    # Simple health check
+    # Readiness check: 503 until the MCP stack is loaded and the catalog warm-up
+    # has finished (with --workers, a worker only accepts once both are done)
     async def healthz(request):
-        return JSONResponse({"status": "ok"})
+        if mcp_endpoint.manager is None:
+            return JSONResponse({"status": "starting", "warmup": WARMUP_STATUS.as_dict()}, status_code=503)
+        if WARMUP_STATUS.state != "ready":
+            return JSONResponse({"status": "warming", "warmup": WARMUP_STATUS.as_dict()}, status_code=503)
+        return JSONResponse({"status": "ok", "warmup": WARMUP_STATUS.as_dict()})
+    
+    # Prometheus scrape endpoint (per worker process)
+    async def metrics(request):
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
     
     # Wrap MCP handler with Bearer auth
     protected_http = require_bearer_token(
-        handle_streamable_http, 
+        mcp_endpoint, 
         api_auth_header,
         api_auth_token
     )
         
     @asynccontextmanager
     async def lifespan(app: Starlette) -> AsyncIterator[None]:
-        """Context manager for session manager."""
-        async with session_manager.run():
-            logger.info("Application started with StreamableHTTP session manager")
-            try:
-                yield
-            finally:
-                logger.info("Application shutting down...")
-                reset_course_connection_cache()
+        """Load the MCP stack, warm the catalog and keep a snapshot in sync in the background; close shared clients on shutdown."""
+        stop = asyncio.Event()
+        mcp_task = asyncio.create_task(mcp_endpoint.run(stop))
+        warming = asyncio.create_task(_warm_up_after(mcp_endpoint))
+        background = [warming]
+        if SETTINGS.catalog_source == "snapshot" and SETTINGS.snapshot_sync_interval > 0:
+            background.append(asyncio.create_task(_run_snapshot_sync()))
+        if workers > 1:
+            # Prefork workers share one listening socket, so /healthz can only
+            # speak for whichever worker accepts the probe. uvicorn starts
+            # accepting when startup returns: hold it until this worker is
+            # warm, so probes and MCP traffic only ever reach ready workers.
+            await warming
+        try:
+            yield
+        finally:
+            logger.info("Application shutting down...")
+            for task in background:
+                task.cancel()
+            stop.set()
+            await asyncio.gather(mcp_task, return_exceptions=True)
+            from tools.course_catalog.client import close_course_connection
+            await close_course_connection()
+            close_cache_backend()
                 
     # Initialize starlette app
     starlette_app = Starlette(
@@ -118,6 +254,7 @@ def main(port: int, log_level: str, debug: bool):
         routes=[
             Route("/", root_redirect),
             Route("/healthz", healthz),
+            Route("/metrics", metrics),
             Mount("/mcp", app=protected_http)
         ],
         lifespan=lifespan,
@@ -131,12 +268,74 @@ def main(port: int, log_level: str, debug: bool):
         expose_headers=["Mcp-Session-Id"]
     )
     
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", port))
+    
+    if workers > 1:
+        serve_prefork(starlette_app, host, port, workers, log_level.lower())
+        return 0
+    
     uvicorn.run(
         starlette_app,
-        host=os.getenv("HOST", "0.0.0.0"),
-        port=int(os.getenv("PORT", port)),
+        host=host,
+        port=port,
         log_level=log_level.lower(),
         reload=debug,
     )
     
     return 0
+
+
+async def _warm_up_after(mcp_endpoint: LazyMCP) -> None:
+    # Warm-up imports the catalog modules on the event loop; let the worker
+    # thread finish importing them first
+    await mcp_endpoint.loaded.wait()
+    await warm_up(ACADEMIC_YEAR)
+
+
+async def _refresh_snapshot() -> None:
+    from tools.course_catalog import snapshot as catalog_snapshot
+    from tools.course_catalog.client import close_course_connection
+
+    try:
+        await catalog_snapshot.refresh_snapshot(SETTINGS.snapshot_path, ACADEMIC_YEAR, SETTINGS.snapshot_concurrency)
+    finally:
+        await close_course_connection()
+
+
+async def _run_snapshot_sync() -> None:
+    from tools.course_catalog.sync import run_snapshot_sync
+
+    try:
+        await run_snapshot_sync(current_worker_slot())
+    except Exception:
+        logger.exception("Snapshot sync stopped")
+
+
+async def _sync_snapshot() -> None:
+    from tools.course_catalog import snapshot as catalog_snapshot
+    from tools.course_catalog.client import close_course_connection
+    from tools.course_catalog.sync import create_sync
+
+    sync = create_sync()
+    try:
+        report = await sync.sync_all(SETTINGS.snapshot_concurrency)
+    finally:
+        await close_course_connection()
+    if report.changed_departments:
+        catalog_snapshot.save_snapshot(sync.snapshot, SETTINGS.snapshot_path)
+    logger.info("Snapshot sync: %s", report.summary())
+    click.echo(json.dumps(report.as_dict(), indent=2))
+
+
+def _load_snapshot() -> None:
+    from tools.course_catalog import snapshot as catalog_snapshot
+
+    if not os.path.exists(SETTINGS.snapshot_path):
+        raise RuntimeError(
+            f"Catalog snapshot {SETTINGS.snapshot_path!r} not found. Create it with --refresh-snapshot"
+        )
+    snapshot = catalog_snapshot.load_snapshot(SETTINGS.snapshot_path)
+    if snapshot.year != ACADEMIC_YEAR:
+        logger.warning("Snapshot is for %s but the server queries %s", snapshot.year, ACADEMIC_YEAR)
+    catalog_snapshot.use_snapshot(snapshot)
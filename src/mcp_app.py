@@ -0,0 +1,40 @@
+import logging
+from typing import Any
+
+import mcp.types as types
+from mcp.server.lowlevel import Server
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+
+from helpers import return_tools
+from tools.registry import dispatch, list_all_tools
+
+# The MCP server stack. Importing `mcp` dominates process startup, so app.py
+# loads this module in a worker thread once uvicorn is already listening.
+
+logger = logging.getLogger(__name__)
+
+
+def build_session_manager() -> StreamableHTTPSessionManager:
+    """Create the MCP server with every registered tool, behind a stateless session manager."""
+
+    app = Server("stanford-mcp")
+
+    # Imports the tool modules; log tools
+    logger.info("\n\n" + return_tools() + "\n\n")
+
+    @app.list_tools()
+    async def list_tools() -> list[types.Tool]:
+        return list_all_tools()
+
+    @app.call_tool()
+    async def call_tool(name: str, arguments: dict[str, Any]) -> list[types.ContentBlock]:
+        ctx = app.request_context
+        return await dispatch(name, arguments, ctx)
+
+    # Create the session manager with stateless mode
+    return StreamableHTTPSessionManager(
+        app=app,
+        event_store=None,
+        json_response=False,
+        stateless=True
+    )
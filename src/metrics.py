@@ -0,0 +1,149 @@
+import math
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+# Minimal in-process metrics with Prometheus text exposition (format 0.0.4).
+#
+# Counters and histograms are recorded directly; point-in-time values owned by
+# other modules (e.g. cache statistics) are pulled at scrape time through
+# collectors registered with `register_collector`. With --workers > 1 every
+# worker keeps its own numbers and a scrape sees the worker that answers it.
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]  # (name suffix, labels, value)
+Family = Tuple[str, str, str, List[Sample]]  # (name, type, help, samples)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing count, one series per label combination."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self) -> Family:
+        samples = [("", dict(zip(self.labelnames, k)), v) for k, v in sorted(self._values.items())]
+        return self.name, "counter", self.help, samples
+
+
+class Histogram:
+    """Cumulative-bucket histogram with sum and count, one series per label combination."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        # Per-bucket (non-cumulative) counts, then sum and count
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def collect(self) -> Family:
+        samples: List[Sample] = []
+        for key, series in sorted(self._series.items()):
+            base = dict(zip(self.labelnames, key))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                samples.append(("_bucket", {**base, "le": _format_value(bound)}, cumulative))
+            samples.append(("_sum", base, series[-2]))
+            samples.append(("_count", base, series[-1]))
+        return self.name, "histogram", self.help, samples
+
+
+_metrics: List[Union[Counter, Histogram]] = []
+_collectors: List[Callable[[], Iterable[Family]]] = []
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    metric = Counter(name, help, labelnames)
+    _metrics.append(metric)
+    return metric
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    metric = Histogram(name, help, labelnames, buckets)
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collector: Callable[[], Iterable[Family]]) -> None:
+    """Add a callable that returns metric families computed at scrape time."""
+
+    _collectors.append(collector)
+
+
+def render() -> str:
+    """Every registered metric in Prometheus text format."""
+
+    families: List[Family] = [m.collect() for m in _metrics]
+    for collector in _collectors:
+        families.extend(collector())
+
+    lines: List[str] = []
+    for name, kind, help, samples in families:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# Tool calls, recorded in tools.registry.dispatch
+TOOL_CALLS = counter("mcp_tool_calls_total", "Tool calls handled, by tool.", ["tool"])
+TOOL_ERRORS = counter("mcp_tool_errors_total", "Tool calls that raised, by tool.", ["tool"])
+TOOL_LATENCY = histogram("mcp_tool_latency_seconds", "Tool call latency in seconds, by tool.", ["tool"])
+TOOL_RESPONSE_BYTES = histogram(
+    "mcp_tool_response_bytes", "UTF-8 size of tool call text output, by tool.", ["tool"], BYTES_BUCKETS
+)
+
+# ExploreCourses requests, recorded in the catalog client
+UPSTREAM_REQUESTS = counter(
+    "explorecourses_requests_total", "Requests made to ExploreCourses, by endpoint and outcome.", ["endpoint", "status"]
+)
+UPSTREAM_LATENCY = histogram(
+    "explorecourses_request_latency_seconds", "ExploreCourses request latency in seconds, by endpoint.", ["endpoint"]
+)
+UPSTREAM_RESPONSE_BYTES = histogram(
+    "explorecourses_response_bytes", "ExploreCourses response body size, by endpoint.", ["endpoint"], BYTES_BUCKETS
+)
+UPSTREAM_UNCHANGED = counter(
+    "explorecourses_unchanged_total",
+    "Responses reused without parsing, by endpoint and how they were recognised (304 or digest).",
+    ["endpoint", "via"],
+)
@@ -0,0 +1,109 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Tuple
+
+# --profile-startup: re-run the server under `python -X importtime`, time it
+# from exec to listening and to a 200 from /healthz (MCP stack loaded and
+# warm-up done), then stop it and report what the imports cost on either
+# side of "listening".
+
+READY_TIMEOUT = 120.0
+TOP = 15
+
+Import = Tuple[float, int, float, float, str]  # (arrival, depth, self ms, cumulative ms, module)
+
+
+def _parse(line: str) -> Tuple[int, float, float, str]:
+    # "import time:       765 |     874276 |   app"
+    self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+    module = name.rstrip("\n")
+    depth = (len(module) - len(module.lstrip(" ")) - 1) // 2
+    return depth, int(self_us) / 1000, int(cumulative_us) / 1000, module.strip()
+
+
+def _listening(port: int) -> bool:
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
+def _ready(port: int) -> bool:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1.0) as resp:
+            return resp.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def _table(title: str, rows: List[Import], key: int) -> None:
+    print(f"\n{title}")
+    print(f"  {'cumulative ms':>13}  {'self ms':>8}  module")
+    for _, _, self_ms, cumulative_ms, module in sorted(rows, key=lambda r: -r[key])[:TOP]:
+        print(f"  {cumulative_ms:13.1f}  {self_ms:8.1f}  {module}")
+
+
+def profile_startup(port: int) -> int:
+    """Run the server with the current arguments (minus --profile-startup) and print its startup profile."""
+
+    port = int(os.getenv("PORT", port))
+    argv = [sys.executable, "-X", "importtime", sys.argv[0], *(a for a in sys.argv[1:] if a != "--profile-startup")]
+
+    imports: List[Import] = []
+    output: List[str] = []
+    started = time.perf_counter()
+    proc = subprocess.Popen(argv, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+    def read() -> None:
+        for line in proc.stderr:
+            if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+                imports.append((time.perf_counter() - started, *_parse(line)))
+            else:
+                output.append(line)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+
+    marks: Dict[str, float] = {}
+    deadline = started + READY_TIMEOUT
+    while proc.poll() is None and time.perf_counter() < deadline:
+        if "listening" not in marks and _listening(port):
+            marks["listening"] = time.perf_counter() - started
+        if "listening" in marks and _ready(port):
+            marks["ready"] = time.perf_counter() - started
+            break
+        time.sleep(0.005)
+
+    if proc.poll() is None:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    reader.join(timeout=5)
+
+    if "ready" not in marks:
+        sys.stderr.write("".join(output[-40:]))
+        print(f"Server did not become ready (exit code {proc.returncode})", file=sys.stderr)
+        return 1
+
+    listening = marks["listening"]
+    before = [i for i in imports if i[0] <= listening]
+    after = [i for i in imports if i[0] > listening]
+    print("Startup profile (python -X importtime)")
+    print(f"  exec -> listening  {listening * 1000:8.0f} ms")
+    print(f"  exec -> ready      {marks['ready'] * 1000:8.0f} ms  (MCP stack loaded, warm-up done)")
+    print(f"  imports before listening: {len(before)} modules, {sum(i[2] for i in before):.0f} ms")
+    print(f"  imports after listening:  {len(after)} modules, {sum(i[2] for i in after):.0f} ms")
+    _table("Top-level imports before listening", [i for i in before if i[1] == 0], 3)
+    _table("Top-level imports after listening (background)", [i for i in after if i[1] == 0], 3)
+    _table("Slowest modules by self time", imports, 2)
+    return 0
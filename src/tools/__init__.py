@@ -1,11 +1,10 @@
-from .course_catalog.course_catalog import register_all as register_course_catalog
+from .registry import register_module
 
 
 def register_all_tools() -> None:
     """Register all tool groups with the registry.
 
-    Add additional registrations here as you create new tool modules.
+    Modules are imported on first tool use, not here. Add additional
+    registrations here as you create new tool modules.
     """
-    register_course_catalog()
-
-
+    register_module("tools.course_catalog.course_catalog")
@@ -1,6 +1,13 @@
 """Course catalog tools package."""
 
-# Re-export common utilities for convenience
-from .formatting import format_course  # noqa: F401
+from typing import Any
 
 
+# Re-export common utilities for convenience, imported on first access so the
+# package itself stays cheap to import (settings are read at startup)
+def __getattr__(name: str) -> Any:
+    if name == "format_course":
+        from .formatting import format_course
+
+        return format_course
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,203 @@
+import logging
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Tuple
+
+from .settings import CACHE_BACKENDS, SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Second-level store for parsed catalog data, shared by all catalog caches.
+
+    Values are addressed by a namespace ("schools", "query", "course", ...) and
+    a hashable key, and are returned together with the wall-clock time they
+    were stored so each cache can apply its own TTL.
+    """
+
+    @abstractmethod
+    def get(self, namespace: str, key: Hashable) -> Optional[Tuple[Any, float]]:
+        ...
+
+    def set(self, namespace: str, key: Hashable, value: Any) -> None:
+        self.set_many(namespace, [(key, value)])
+
+    @abstractmethod
+    def set_many(self, namespace: str, items: Iterable[Tuple[Hashable, Any]]) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: Hashable) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteBackend(CacheBackend):
+    """SQLite-file backend that survives restarts and is shared by every
+    worker process on the host.
+
+    Values are pickled, so the database file must only ever be written by
+    this server. Writes (pickling included) are queued to a background
+    writer thread, so a database locked by another worker never blocks the
+    event loop; reads use their own connection with a short busy timeout
+    and count as a miss when the database is locked. WAL mode lets those
+    reads proceed while a writer commits. The writer keeps the table to
+    `max_entries` rows, dropping the oldest.
+    """
+
+    READ_TIMEOUT = 0.05
+    PRUNE_EVERY = 60.0
+
+    def __init__(self, path: str, max_entries: int = 10_000):
+        self._path = path
+        self._max_entries = max_entries
+        self._read_lock = threading.Lock()
+        self._reader = sqlite3.connect(path, timeout=self.READ_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self._jobs: "queue.Queue[Optional[Callable[[sqlite3.Connection], None]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="cache-backend-writer", daemon=True)
+        self._writer.start()
+
+    def _write_loop(self) -> None:
+        conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS catalog_cache ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value BLOB NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS catalog_cache_stored_at ON catalog_cache (stored_at)")
+        pruned_at = 0.0
+        while True:
+            job = self._jobs.get()
+            try:
+                if job is None:
+                    break
+                job(conn)
+                if time.monotonic() - pruned_at >= self.PRUNE_EVERY:
+                    self._prune(conn)
+                    pruned_at = time.monotonic()
+            except Exception:
+                logger.warning("Cache backend write failed", exc_info=True)
+            finally:
+                self._jobs.task_done()
+        conn.close()
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "DELETE FROM catalog_cache WHERE rowid IN"
+            " (SELECT rowid FROM catalog_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Tuple[Any, float]]:
+        try:
+            with self._read_lock:
+                row = self._reader.execute(
+                    "SELECT value, stored_at FROM catalog_cache WHERE namespace = ? AND key = ?",
+                    (namespace, repr(key)),
+                ).fetchone()
+        except sqlite3.OperationalError as exc:
+            # Locked by a writer, or the table is not created yet
+            logger.debug("Cache backend read of %s/%r missed: %s", namespace, key, exc)
+            return None
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0]), row[1]
+        except Exception:
+            logger.warning("Dropping unreadable cache entry %s/%r", namespace, key, exc_info=True)
+            self.delete(namespace, key)
+            return None
+
+    def set_many(self, namespace: str, items: Iterable[Tuple[Hashable, Any]]) -> None:
+        items = list(items)
+        if items:
+            self._jobs.put(lambda conn: self._write(conn, namespace, items, time.time()))
+
+    def _write(self, conn: sqlite3.Connection, namespace: str, items: List[Tuple[Hashable, Any]], now: float) -> None:
+        rows = [
+            (namespace, repr(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now)
+            for key, value in items
+        ]
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO catalog_cache (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def delete(self, namespace: str, key: Hashable) -> None:
+        self._jobs.put(
+            lambda conn: conn.execute("DELETE FROM catalog_cache WHERE namespace = ? AND key = ?", (namespace, repr(key)))
+        )
+
+    def flush(self) -> None:
+        """Wait until every queued write has been applied."""
+
+        self._jobs.join()
+
+    def clear(self) -> None:
+        self._jobs.put(lambda conn: conn.execute("DELETE FROM catalog_cache"))
+        self.flush()
+
+    def close(self) -> None:
+        self._jobs.put(None)
+        self._writer.join(timeout=10)
+        with self._read_lock:
+            self._reader.close()
+
+
+# Process-wide backend, created lazily so forked workers each open their own connection
+_backend: Optional[CacheBackend] = None
+
+
+def get_cache_backend() -> Optional[CacheBackend]:
+    """Return the backend selected by CACHE_BACKEND, or None for "memory".
+
+    With "memory" the in-process caches are the only tier: a second store in
+    the same process would just hand back what their byte budgets evicted.
+    """
+
+    global _backend
+    if _backend is None:
+        if SETTINGS.cache_backend == "sqlite":
+            _backend = SqliteBackend(SETTINGS.cache_path, SETTINGS.cache_backend_max_entries)
+        elif SETTINGS.cache_backend not in CACHE_BACKENDS:
+            raise ValueError(f"Unknown CACHE_BACKEND {SETTINGS.cache_backend!r}; expected one of {', '.join(CACHE_BACKENDS)}")
+    return _backend
+
+
+def _forget_backend() -> None:
+    # A forked worker has no writer thread; it opens its own backend on first use
+    global _backend
+    _backend = None
+
+
+os.register_at_fork(after_in_child=_forget_backend)
+
+
+def close_cache_backend() -> None:
+    global _backend
+    if _backend is not None:
+        backend, _backend = _backend, None
+        backend.close()
@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from .backends import get_cache_backend
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+async def backend_get(namespace: str, key: Hashable) -> Optional[Tuple[Any, float]]:
+    """Read from the shared cache backend in a worker thread, so neither the
+    query nor unpickling runs on the event loop; backend errors degrade to a miss."""
+
+    backend = get_cache_backend()
+    if backend is None:
+        return None
+    try:
+        return await asyncio.to_thread(backend.get, namespace, key)
+    except Exception:
+        logger.warning("Cache backend read failed for %s/%r", namespace, key, exc_info=True)
+        return None
+
+
+def backend_set_many(namespace: str, items: Iterable[Tuple[Hashable, Any]]) -> None:
+    """Write to the shared cache backend; backend errors are logged, not raised."""
+
+    try:
+        backend = get_cache_backend()
+        if backend is not None:
+            backend.set_many(namespace, items)
+    except Exception:
+        logger.warning("Cache backend write failed for %s", namespace, exc_info=True)
+
+
+def monotonic_from_wall(stored_at: float) -> float:
+    return time.monotonic() - max(0.0, time.time() - stored_at)
+
+
+class Revalidator:
+    """Runs at most one background reload per key.
+
+    A failed reload is logged and dropped, leaving whatever the caller had
+    cached in place.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._running: Dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._running
+
+    def schedule(self, key: Hashable, loader: Loader, store: Callable[[Any], None]) -> None:
+        if key in self._running:
+            return
+        self._running[key] = asyncio.create_task(self._run(key, loader, store))
+
+    async def _run(self, key: Hashable, loader: Loader, store: Callable[[Any], None]) -> None:
+        try:
+            value = await loader()
+        except Exception:
+            logger.warning("%s: background refresh of %r failed; serving last good copy", self._name, key, exc_info=True)
+        else:
+            store(value)
+        finally:
+            self._running.pop(key, None)
+
+
+class RefreshingCache:
+    """Per-key cache with stale-while-revalidate.
+
+    - Entries younger than `ttl` are returned without awaiting anything.
+    - Entries past `ttl` but within the `grace` window after it are returned
+      immediately while a single background task reloads them. If that
+      reload fails, the last good value keeps being served.
+    - Missing entries, and entries past `ttl + grace`, make the caller wait
+      for the loader. If that load fails and an old entry exists, the old
+      entry is returned instead of the error.
+
+    With a `namespace`, entries are also written to the shared cache backend
+    and read back from it on a local miss, so a restarted process starts warm.
+    """
+
+    def __init__(
+        self,
+        ttl: Callable[[], float],
+        grace: Callable[[], float] = lambda: 0.0,
+        name: str = "cache",
+        namespace: Optional[str] = None,
+    ):
+        self._ttl = ttl
+        self._grace = grace
+        self._name = name
+        self._namespace = namespace
+        self._entries: Dict[Hashable, Tuple[Any, float]] = {}
+        self._revalidator = Revalidator(name)
+        self.hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    async def get(self, key: Hashable, loader: Loader) -> Any:
+        entry = self._entries.get(key)
+        from_backend = False
+        if entry is None and self._namespace:
+            stored = await backend_get(self._namespace, key)
+            # A load may have stored a newer value while the backend was read
+            entry = self._entries.get(key)
+            if entry is None and stored is not None:
+                entry = self._entries[key] = (stored[0], monotonic_from_wall(stored[1]))
+                from_backend = True
+        if entry is not None:
+            value, loaded_at = entry
+            age = time.monotonic() - loaded_at
+            if age < self._ttl() + self._grace():
+                if from_backend:
+                    self.backend_hits += 1
+                else:
+                    self.hits += 1
+                if age >= self._ttl():
+                    self.stale_hits += 1
+                    self._revalidator.schedule(key, loader, lambda v: self._store(key, v))
+                return value
+
+        self.misses += 1
+        try:
+            value = await loader()
+        except Exception:
+            if entry is None:
+                raise
+            self.stale_hits += 1
+            logger.warning("%s: reload of %r failed; serving last good copy", self._name, key, exc_info=True)
+            return entry[0]
+        self._store(key, value)
+        return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic())
+        if self._namespace:
+            backend_set_many(self._namespace, [(key, value)])
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "backend_hits": self.backend_hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+        }
+
+
+class LRUCache:
+    """Bounded LRU cache with per-entry TTL and hit/miss counters.
+
+    Entries are evicted least-recently-used first whenever either the entry
+    count or the estimated byte size (as reported by ``sizeof``) exceeds its
+    budget. Expired entries count as misses but are kept until evicted or
+    replaced, so ``get_stale`` can still serve them when upstream is down.
+
+    A ``get`` given a `revalidate` loader serves entries up to `grace`
+    seconds past their TTL and reloads them in the background.
+
+    With a `namespace`, entries are written through to the shared cache
+    backend. ``get`` only consults local entries; ``aget`` and ``get_stale``
+    retry a local miss against the backend before counting it.
+    `on_evict` is called with the key of every entry evicted for space.
+    """
+
+    def __init__(
+        self,
+        ttl: Callable[[], float],
+        max_entries: Callable[[], int],
+        max_bytes: Callable[[], int],
+        sizeof: Callable[[Any], int],
+        grace: Callable[[], float] = lambda: 0.0,
+        name: str = "cache",
+        namespace: Optional[str] = None,
+        on_evict: Optional[Callable[[Hashable], None]] = None,
+    ):
+        self._ttl = ttl
+        self._grace = grace
+        self._on_evict = on_evict
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self.name = name
+        self._namespace = namespace
+        self._revalidator = Revalidator(name)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def _limit(self, revalidate: Optional[Loader]) -> float:
+        return self._ttl() + (self._grace() if revalidate is not None else 0.0)
+
+    def _get_local(self, key: Hashable, limit: float) -> Optional[Tuple[Any, float, int]]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[1] >= limit:
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _serve(self, key: Hashable, value: Any, stored_at: float, revalidate: Optional[Loader]) -> Any:
+        if time.monotonic() - stored_at >= self._ttl():
+            self.stale_hits += 1
+            self._revalidator.schedule(key, revalidate, lambda v: self.put(key, v))
+        return value
+
+    def get(self, key: Hashable, revalidate: Optional[Loader] = None) -> Optional[Any]:
+        """Return the value for `key` if it is fresh, or within the grace
+        window when `revalidate` is given (scheduling a background reload)."""
+
+        entry = self._get_local(key, self._limit(revalidate))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._serve(key, entry[0], entry[1], revalidate)
+
+    async def aget(self, key: Hashable, revalidate: Optional[Loader] = None) -> Optional[Any]:
+        """``get``, retrying a local miss against the shared cache backend."""
+
+        limit = self._limit(revalidate)
+        entry = self._get_local(key, limit)
+        if entry is not None:
+            self.hits += 1
+        else:
+            entry = await self._get_from_backend(key, limit)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.backend_hits += 1
+        return self._serve(key, entry[0], entry[1], revalidate)
+
+    async def _get_from_backend(self, key: Hashable, limit: float) -> Optional[Tuple[Any, float]]:
+        stored = await backend_get(self._namespace, key) if self._namespace else None
+        if stored is None or time.time() - stored[1] >= limit:
+            return None
+        entry = (stored[0], monotonic_from_wall(stored[1]))
+        # Keep a value put while the backend was read
+        if key not in self._entries:
+            self._insert(key, *entry)
+        return entry
+
+    async def get_stale(self, key: Hashable) -> Optional[Any]:
+        """Return the last stored value for `key` however old it is, or None."""
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.stale_hits += 1
+            return entry[0]
+        stored = await backend_get(self._namespace, key) if self._namespace else None
+        if stored is None:
+            return None
+        self.stale_hits += 1
+        return stored[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._insert(key, value, time.monotonic())
+        if self._namespace:
+            backend_set_many(self._namespace, [(key, value)])
+
+    def _insert(self, key: Hashable, value: Any, stored_at: float) -> None:
+        size = self._sizeof(value)
+        if size > self._max_bytes():
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, stored_at, size)
+        self.bytes += size
+        while self._entries and (len(self._entries) > self._max_entries() or self.bytes > self._max_bytes()):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+            if self._on_evict is not None:
+                self._on_evict(oldest)
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def discard(self, key: Hashable) -> None:
+        """Drop `key` locally if present (the backend copy, if any, is left alone)."""
+
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "backend_hits": self.backend_hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,237 @@
+import hashlib
+import importlib.util
+import logging
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import anyio
+import httpx
+from explorecourses.classes import School
+
+import tracing
+from metrics import UPSTREAM_LATENCY, UPSTREAM_REQUESTS, UPSTREAM_RESPONSE_BYTES, UPSTREAM_UNCHANGED
+from .cache import LRUCache
+from .filtering import canonical_filters
+from .gate import UPSTREAM_GATE, UpstreamGate, UpstreamUnavailable
+from .parsing import parse_courses
+from .records import CourseRecord, CourseSummary, approx_size
+from .settings import SETTINGS
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+XML_VIEW = "xml-20200810"
+
+
+def parse_schools(content: bytes) -> List[School]:
+    root = ET.fromstring(content)
+    return [School(school) for school in root.findall(".//school")]
+
+
+@dataclass(frozen=True, slots=True)
+class ValidatedResponse:
+    """Last parsed upstream response for a request, with what is needed to revalidate it."""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+    digest: bytes
+    size: int  # estimated size of `value`, not of the response body
+    value: Any
+
+
+def _digest(content: bytes) -> bytes:
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+def _parsed_sizeof(value: List[Any]) -> int:
+    if value and isinstance(value[0], School):
+        return 64 + sum(256 + 128 * len(s.departments) for s in value)
+    return approx_size(value)
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """Pooled keep-alive client sized from SETTINGS, using HTTP/2 when enabled and available."""
+
+    http2 = SETTINGS.http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+        http2 = False
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(SETTINGS.http_timeout, connect=SETTINGS.http_connect_timeout),
+        limits=httpx.Limits(
+            max_connections=SETTINGS.http_max_connections,
+            max_keepalive_connections=SETTINGS.http_max_keepalive_connections,
+            keepalive_expiry=SETTINGS.http_keepalive_expiry,
+        ),
+        http2=http2,
+        follow_redirects=True,
+    )
+
+
+class AsyncCourseConnection:
+    """Non-blocking counterpart of ``explorecourses.CourseConnection``.
+
+    Requests go through a shared, pooled ``httpx.AsyncClient`` and XML parsing
+    runs in a worker thread, so a slow ExploreCourses round-trip never stalls
+    the event loop. Schools are the same ``School`` objects the synchronous
+    client returns; courses are streamed into compact ``CourseRecord``s, or
+    ``CourseSummary``s when only search-result fields are needed. Concurrent
+    identical requests are coalesced into a single upstream fetch whose
+    parsed result every caller shares, so callers must treat returned lists
+    as read-only. Connections are kept alive and reused (see
+    ``build_http_client``), and every request passes through the shared
+    UPSTREAM_GATE, which raises UpstreamUnavailable instead of calling a
+    struggling ExploreCourses.
+
+    The last parsed response for each request is kept with its ETag,
+    Last-Modified and a content digest, within a budget on the estimated
+    size of the parsed values (the objects the query cache and COURSE_INDEX
+    hold too). Repeat requests are sent conditionally; a 304, or a 200 whose body hashes the same, returns the
+    previously parsed object without parsing again, so downstream caches
+    and COURSE_INDEX see the identical records and keep what they derived
+    from them.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        gate: Optional[UpstreamGate] = None,
+    ):
+        self._base_url = base_url or SETTINGS.explorecourses_url
+        self._client = client or build_http_client()
+        self._gate = gate or UPSTREAM_GATE
+        self._flight = SingleFlight()
+        self._responses = LRUCache(
+            ttl=lambda: float("inf"),
+            max_entries=lambda: SETTINGS.response_cache_max_entries,
+            max_bytes=lambda: SETTINGS.response_cache_max_bytes,
+            sizeof=lambda r: r.size,
+            name="responses",
+        )
+
+    async def _get(self, path: str, params: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        endpoint = path or "schools"
+        with tracing.span("upstream.fetch", endpoint=endpoint) as sp:
+            try:
+                async with self._gate.slot():
+                    status = "error"
+                    started = time.perf_counter()
+                    try:
+                        res = await self._client.get(self._base_url + path, params=params, headers=headers)
+                        status = str(res.status_code)
+                        sp.set("http_version", res.http_version)
+                        if res.status_code != 304 or not headers:
+                            res.raise_for_status()
+                    finally:
+                        UPSTREAM_REQUESTS.inc(endpoint, status)
+                        UPSTREAM_LATENCY.observe(time.perf_counter() - started, endpoint)
+                        sp.set("status", status)
+            except UpstreamUnavailable:
+                UPSTREAM_REQUESTS.inc(endpoint, "rejected")
+                sp.set("status", "rejected")
+                raise
+            UPSTREAM_RESPONSE_BYTES.observe(len(res.content), endpoint)
+            sp.set("bytes", len(res.content))
+        return res
+
+    async def _get_parsed(self, path: str, params: Dict[str, Any], parse: Callable[[bytes], Any], kind: str) -> Any:
+        """GET and parse, revalidating the last response for the same request instead of re-parsing it."""
+
+        endpoint = path or "schools"
+        key = (path, tuple(sorted(params.items())), kind)
+        cached = self._responses.get(key)
+        headers: Dict[str, str] = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        res = await self._get(path, params, headers)
+        if res.status_code == 304:
+            UPSTREAM_UNCHANGED.inc(endpoint, "304")
+            return cached.value
+
+        digest = await anyio.to_thread.run_sync(_digest, res.content)
+        if cached is not None and cached.digest == digest:
+            UPSTREAM_UNCHANGED.inc(endpoint, "digest")
+            value, size = cached.value, cached.size
+        else:
+            with tracing.span("parse", kind=kind) as sp:
+                value = await anyio.to_thread.run_sync(parse, res.content)
+                sp.set("items", len(value))
+            size = _parsed_sizeof(value)
+        self._responses.put(key, ValidatedResponse(
+            res.headers.get("etag"), res.headers.get("last-modified"), digest, size, value,
+        ))
+        return value
+
+    async def get_schools(self, academic_year: str) -> List[School]:
+        return await self._flight.do(("schools", academic_year), lambda: self._fetch_schools(academic_year))
+
+    async def get_courses_by_query(self, query: Any, *filters: str, year: Optional[str] = None) -> List[CourseRecord]:
+        key = ("query", str(query), canonical_filters(filters), year)
+        return await self._flight.do(key, lambda: self._fetch_courses(query, filters, year, False))
+
+    async def get_course_summaries_by_query(
+        self, query: Any, *filters: str, year: Optional[str] = None
+    ) -> List[CourseSummary]:
+        """Like get_courses_by_query, but parses only the fields search results show."""
+
+        key = ("summary", str(query), canonical_filters(filters), year)
+        return await self._flight.do(key, lambda: self._fetch_courses(query, filters, year, True))
+
+    async def _fetch_schools(self, academic_year: str) -> List[School]:
+        params = {"view": XML_VIEW, "year": academic_year.replace("-", "")}
+        return await self._get_parsed("", params, parse_schools, "schools")
+
+    async def _fetch_courses(self, query: Any, filters: Tuple[str, ...], year: Optional[str], summary: bool) -> List[Any]:
+        params = self._search_params(query, filters, year)
+        if summary:
+            return await self._get_parsed("search", params, lambda content: parse_courses(content, True), "summary")
+        return await self._get_parsed("search", params, parse_courses, "full")
+
+    def _search_params(self, query: Any, filters: Tuple[str, ...], year: Optional[str]) -> Dict[str, Any]:
+        params = {
+            "view": XML_VIEW,
+            "filter-coursestatus-Active": "on",
+            "q": str(query),
+        }
+        params.update({f: "on" for f in filters})
+        if year:
+            params["academicYear"] = year.replace("-", "")
+        return params
+
+    async def get_department_xml(self, code: str, year: Optional[str] = None) -> bytes:
+        """Raw search XML for every active course in a department (used for snapshots)."""
+
+        res = await self._get("search", self._search_params(code, (f"filter-departmentcode-{code}",), year))
+        return res.content
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# Process-wide connection, owned by the Starlette lifespan in app.py
+_connection: Optional[AsyncCourseConnection] = None
+
+
+def get_course_connection() -> AsyncCourseConnection:
+    """Return the process-wide AsyncCourseConnection, creating it on first use."""
+
+    global _connection
+    if _connection is None:
+        _connection = AsyncCourseConnection()
+    return _connection
+
+
+async def close_course_connection() -> None:
+    """Close the pooled HTTP client and drop the process-wide connection."""
+
+    global _connection
+    if _connection is not None:
+        conn, _connection = _connection, None
+        await conn.aclose()
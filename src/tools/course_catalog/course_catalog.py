@@ -1,34 +1,176 @@
 import asyncio
-from typing import Any
-from functools import lru_cache
-from explorecourses import CourseConnection
-from explorecourses.classes import Course
+import base64
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable
+from explorecourses.classes import School
 import mcp.types as types
-import explorecourses.filters as filters
 
+import tracing
+from metrics import register_collector
 from tools.registry import register_tool
-from .formatting import format_course, format_course_summary
-from .filtering import build_filters_from_arguments
+from .cache import LRUCache, RefreshingCache
+from .client import get_course_connection
+from .formatting import TextWriter, format_course_no_sections, format_course_sections, format_course_summary
+from .filtering import build_filters_from_arguments, canonical_filters, course_matches_filters, normalize_query, term_filters
+from .gate import UpstreamUnavailable
+from .index import COURSE_INDEX
+from .records import CourseRecord, CourseSummary, approx_size
+from .render import RENDER_CACHE
+from .settings import ACADEMIC_YEAR, SETTINGS
+from .snapshot import get_search_index
 
-ACADEMIC_YEAR = "2025-2026"
+logger = logging.getLogger(__name__)
 
 
-# Lazy, module-level singleton for ExploreCourses CourseConnection
-@lru_cache(maxsize=1)
-def get_course_connection() -> CourseConnection:
-    """Return a process-wide CourseConnection instance.
+# Parsed school/department tree per academic year; it changes about once a quarter
+_schools_cache = RefreshingCache(
+    lambda: SETTINGS.schools_ttl, lambda: SETTINGS.schools_stale_grace, name="schools", namespace="schools"
+)
+
+
+async def get_schools(year: str = ACADEMIC_YEAR) -> list[School]:
+    """Return the schools for `year`, served from cache and refreshed in the background once stale."""
+
+    return await _schools_cache.get(year, lambda: get_course_connection().get_schools(year))
+
+
+# Search results keyed by (normalized query, canonical filter tokens, year)
+_query_cache = LRUCache(
+    ttl=lambda: SETTINGS.query_cache_ttl,
+    max_entries=lambda: SETTINGS.query_cache_max_entries,
+    max_bytes=lambda: SETTINGS.query_cache_max_bytes,
+    sizeof=approx_size,
+    grace=lambda: SETTINGS.query_stale_grace,
+    name="query",
+    namespace="query",
+)
+
+
+async def search_courses(query: str, fs: list[str], year: str = ACADEMIC_YEAR) -> list[CourseRecord | CourseSummary]:
+    """Run a catalog search.
 
-    This is created on first use and cached for the lifetime of the process.
-    The import is done lazily to avoid import-time failures when optional
-    dependencies are missing in environments like docs or lint-only runs.
+    With the snapshot catalog source this is answered from the local index;
+    otherwise only summary fields are parsed from the live response and
+    repeated queries are served from the result cache (stale-while-revalidate
+    within QUERY_STALE_GRACE), falling back to expired results when the
+    upstream gate refuses the call.
     """
 
-    return CourseConnection()
+    if SETTINGS.catalog_source == "snapshot":
+        index = get_search_index()
+        if index is not None:
+            with tracing.span("index.search") as sp:
+                courses = index.search(query, fs)
+                sp.set("results", len(courses))
+            return courses
+
+    key = (normalize_query(query), canonical_filters(fs), year)
+
+    def load() -> Awaitable[list[CourseSummary]]:
+        return get_course_connection().get_course_summaries_by_query(key[0], *key[1], year=year)
+
+    with tracing.span("cache.lookup", cache="query") as sp:
+        courses = await _query_cache.aget(key, revalidate=load)
+        sp.set("hit", courses is not None)
+    if courses is None:
+        try:
+            courses = await load()
+        except UpstreamUnavailable:
+            # Expired results beat an error while ExploreCourses is shedding load
+            courses = await _query_cache.get_stale(key)
+            if courses is None:
+                raise
+            logger.info("Serving stale results for %r while upstream is unavailable", key[0])
+            return courses
+        _query_cache.put(key, courses)
+    return courses
+
+
+def clear_caches() -> None:
+    """Drop every in-process catalog cache (schools, search results, course index, rendered text)."""
+
+    _schools_cache.clear()
+    _query_cache.clear()
+    COURSE_INDEX.clear()
+    RENDER_CACHE.clear()
+
+
+def _cache_metrics() -> list:
+    """Scrape-time cache statistics for /metrics."""
+
+    caches = {"schools": _schools_cache.stats(), "query": _query_cache.stats(), "render": RENDER_CACHE.stats()}
 
+    def family(name: str, kind: str, help: str, field: str) -> tuple:
+        return name, kind, help, [("", {"cache": c}, s[field]) for c, s in caches.items() if field in s]
 
-def reset_course_connection_cache() -> None:
-    """Clear the cached CourseConnection (useful in tests)."""
-    get_course_connection.cache_clear()
+    ratios = []
+    for c, s in caches.items():
+        lookups = s["hits"] + s["backend_hits"] + s["misses"]
+        ratios.append(("", {"cache": c}, (s["hits"] + s["backend_hits"]) / lookups if lookups else 0.0))
+
+    return [
+        family("catalog_cache_hits_total", "counter", "In-process cache hits, by cache.", "hits"),
+        family("catalog_cache_backend_hits_total", "counter", "Local misses served by the shared cache backend, by cache.", "backend_hits"),
+        family("catalog_cache_stale_hits_total", "counter", "Expired entries served, by cache.", "stale_hits"),
+        family("catalog_cache_misses_total", "counter", "Cache misses that went to the loader, by cache.", "misses"),
+        family("catalog_cache_evictions_total", "counter", "Entries evicted to stay within budget, by cache.", "evictions"),
+        family("catalog_cache_entries", "gauge", "Entries held in process, by cache.", "entries"),
+        family("catalog_cache_bytes", "gauge", "Estimated bytes held in process, by cache.", "bytes"),
+        ("catalog_cache_hit_ratio", "gauge", "Hits (local or backend) over lookups since start, by cache.", ratios),
+        ("catalog_course_index_entries", "gauge", "Courses held in the course id index.", [("", {}, len(COURSE_INDEX))]),
+    ]
+
+
+register_collector(_cache_metrics)
+
+
+async def get_course(course_id: int, fs: list[str], year: str = ACADEMIC_YEAR) -> CourseRecord:
+    """Look up a single course by id.
+
+    Served from COURSE_INDEX when the indexed record satisfies `fs` (a record
+    with expired metadata or sections is served while the stale component is
+    reloaded in the background);
+    otherwise one targeted upstream query is made and its results are indexed.
+    When the upstream gate refuses that query, an expired indexed record is
+    served instead.
+    """
+
+    def reload() -> Awaitable[list[CourseRecord]]:
+        return get_course_connection().get_courses_by_query(course_id, year=year)
+
+    with tracing.span("index.lookup", course_id=course_id) as sp:
+        course = await COURSE_INDEX.aget(year, course_id, revalidate=reload)
+        sp.set("hit", course is not None)
+        if course is not None and course_matches_filters(course, fs):
+            return course
+
+    try:
+        candidates = await get_course_connection().get_courses_by_query(course_id, *canonical_filters(fs), year=year)
+    except UpstreamUnavailable:
+        course = await COURSE_INDEX.get_stale(year, course_id)
+        if course is None or not course_matches_filters(course, fs):
+            raise
+        logger.info("Serving stale course %s while upstream is unavailable", course_id)
+        return course
+    with tracing.span("candidate_scan", candidates=len(candidates)):
+        COURSE_INDEX.add_all(year, candidates)
+        for c in candidates:
+            if c.course_id == course_id:
+                return c
+
+    raise ValueError(f"No matches found with course_id '{course_id}'")
+
+
+def render_course(course: CourseRecord, year: str, terms: tuple) -> str:
+    """get-course text (as format_course), with the metadata and sections
+    parts cached separately so a sections refresh re-renders only sections."""
+
+    metadata = COURSE_INDEX.metadata(year, course.course_id) or course
+    head = RENDER_CACHE.render(course, year, terms, "metadata", format_course_no_sections, source=metadata)
+    tail = RENDER_CACHE.render(course, year, terms, "sections", format_course_sections, source=course.sections)
+    return head + "\n" + tail
 
 # List schools
 list_schools_spec = types.Tool(
@@ -55,22 +197,20 @@ async def list_schools_handler(arguments: dict[str, Any], ctx: Any) -> list[type
         raise TypeError(
             f"Invalid type for 'include_department_count': expected boolean, got {type(include_count).__name__}"
         )
-    api = get_course_connection()
-
+    schools = await get_schools(ACADEMIC_YEAR)
     
-    schools = api.get_schools(ACADEMIC_YEAR)
-    
-    out = "Schools:"
+    out = TextWriter()
+    out.write("Schools:")
     
     for school in schools:
         deps = school.departments
-        out += f"\n - {school.name}"
+        out.write(f"\n - {school.name}")
         
         if include_count is True:
             plural = "s" if len(deps) > 1 else ""
-            out += f" ({len(deps)} department{plural})"
+            out.write(f" ({len(deps)} department{plural})")
     
-    return [types.TextContent(type="text", text=out)]
+    return [types.TextContent(type="text", text=out.getvalue())]
 
 list_departments_spec = types.Tool(
     name="list-departments",
@@ -90,28 +230,27 @@ list_departments_spec = types.Tool(
 
 async def list_departments_handler(arguments: dict[str, Any], ctx: Any) -> list[types.ContentBlock]:
     school = arguments.get("school", "all")
-    api = get_course_connection()
-    formatted = ""
+    formatted = TextWriter()
     
-    schools = api.get_schools(ACADEMIC_YEAR)
+    schools = await get_schools(ACADEMIC_YEAR)
     
     if school == "all" or school == "":
         for s in schools:
             deps = s.departments
-            formatted+=f"\n\n{s.name}"
+            formatted.write(f"\n\n{s.name}")
             for d in deps:
-                formatted+=f"\n - {d.name} ({d.code})"
+                formatted.write(f"\n - {d.name} ({d.code})")
                 
-        return [types.TextContent(type="text", text=formatted)]
+        return [types.TextContent(type="text", text=formatted.getvalue())]
     
     for sch in schools:
         if (sch.name == school):
             deps = sch.departments
-            formatted+=f"\n{sch.name}"
+            formatted.write(f"\n{sch.name}")
             for d in deps:
-                formatted+=f"\n - {d.name} ({d.code})"
+                formatted.write(f"\n - {d.name} ({d.code})")
                 
-            return [types.TextContent(type="text", text=formatted)]
+            return [types.TextContent(type="text", text=formatted.getvalue())]
  
     
     raise ValueError(f"Unknown school: {school!r}")
@@ -165,33 +304,125 @@ get_course_spec = types.Tool(
 
 async def get_course_handler(arguments: dict[str, Any], ctx: Any) -> list[types.ContentBlock]:
     course_id = arguments.get("course_id")
-    api = get_course_connection()
     
     # Build filters: keep term behavior defaulting to Autumn if not provided
-    fs = build_filters_from_arguments(
-        {**arguments, "terms": arguments.get("terms") or ["Autumn"]},
-        term_field="terms",
-        require_terms=True,
-    )
-    candidates = api.get_courses_by_query(course_id, *fs, year=ACADEMIC_YEAR)
-    course = None
-    
-    # Validate course_id and extract course
-    for c in candidates:
-        if (c.course_id == course_id):
-            course = c
-    
-    if course == None:
-        raise ValueError(f"No matches found with course_id '{course_id}'")
+    with tracing.span("filters"):
+        fs = build_filters_from_arguments(
+            {**arguments, "terms": arguments.get("terms") or ["Autumn"]},
+            term_field="terms",
+            require_terms=True,
+        )
+    course = await get_course(course_id, fs, ACADEMIC_YEAR)
+    with tracing.span("format"):
+        text = render_course(course, ACADEMIC_YEAR, term_filters(fs))
     
-    return [types.TextContent(type="text", text=format_course(course))]
+    return [types.TextContent(type="text", text=text)]
+
+
+get_courses_spec = types.Tool(
+    name="get-courses",
+    title="Course Details (Batch)",
+    description="Fetch full course records for several course_ids in one call. Returns one block per course; a course that cannot be found yields an error block without failing the others.",
+    inputSchema={
+        "type": "object",
+        "required": ["course_ids", "terms"],
+        "properties": {
+            "course_ids": {
+                "type": "array",
+                "minItems": 1,
+                "maxItems": 50,
+                "items": {"type": "number"},
+                "description": "Identifiers of the courses (e.g. [105645, 105750], NOT CS 106B). Use search-courses to find valid IDs.",
+            },
+            **{k: v for k, v in get_course_spec.inputSchema["properties"].items() if k != "course_id"},
+        },
+    },
+)
+
+async def get_courses_handler(arguments: dict[str, Any], ctx: Any) -> list[types.ContentBlock]:
+    course_ids = arguments.get("course_ids")
+    if not isinstance(course_ids, list) or len(course_ids) == 0:
+        raise ValueError("'course_ids' must be a non-empty array of course ids.")
+    if len(course_ids) > 50:
+        raise ValueError("'course_ids' accepts at most 50 ids per call.")
+
+    with tracing.span("filters"):
+        fs = build_filters_from_arguments(
+            {**arguments, "terms": arguments.get("terms") or ["Autumn"]},
+            term_field="terms",
+            require_terms=True,
+        )
+    terms = term_filters(fs)
+    sem = asyncio.Semaphore(SETTINGS.batch_concurrency)
+
+    async def resolve(course_id: Any) -> types.TextContent:
+        with tracing.span("get_course", course_id=course_id):
+            try:
+                if isinstance(course_id, bool) or not isinstance(course_id, (int, float)):
+                    raise TypeError(f"Invalid course_id {course_id!r}: expected a number")
+                async with sem:
+                    course = await get_course(course_id, fs, ACADEMIC_YEAR)
+            except Exception as exc:
+                return types.TextContent(type="text", text=f"# Error\ncourse_id: {course_id}\nerror: {exc}")
+            with tracing.span("format"):
+                text = render_course(course, ACADEMIC_YEAR, terms)
+        return types.TextContent(type="text", text=text)
+
+    # Duplicates resolve once; output keeps the caller's order. Ids that are
+    # not numbers (possibly unhashable) stay one per position and become
+    # per-item errors in resolve()
+    unique: dict[Any, Any] = {}
+    for i, cid in enumerate(course_ids):
+        valid = isinstance(cid, (int, float)) and not isinstance(cid, bool)
+        unique.setdefault(cid if valid else ("invalid", i), cid)
+    return list(await asyncio.gather(*(resolve(cid) for cid in unique.values())))
+
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+PROGRESS_EVERY = 10
+
+
+def _search_fingerprint(query: str, fs: list[str]) -> str:
+    key = normalize_query(query) + "|" + ",".join(canonical_filters(fs))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def _result_version(courses: list[CourseRecord | CourseSummary]) -> str:
+    """Digest of the result order, so a cursor only continues the result list it was cut from."""
+
+    ids = ",".join(str(c.course_id) for c in courses)
+    return hashlib.blake2b(ids.encode("ascii"), digest_size=6).hexdigest()
+
+
+def _encode_cursor(offset: int, fingerprint: str, version: str) -> str:
+    raw = json.dumps({"o": offset, "f": fingerprint, "v": version}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: Any, fingerprint: str) -> tuple[int, str | None]:
+    """Return the offset and result version encoded in `cursor` ((0, None)
+    when absent), rejecting cursors from another search."""
+
+    if cursor is None or cursor == "":
+        return 0, None
+    if not isinstance(cursor, str):
+        raise TypeError("'cursor' must be a string.")
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        offset, cursor_fingerprint, version = int(data["o"]), data["f"], str(data["v"])
+    except Exception:
+        raise ValueError("Invalid 'cursor'; pass the cursor exactly as returned by search-courses.")
+    if cursor_fingerprint != fingerprint or offset < 0:
+        raise ValueError("This 'cursor' belongs to a different search; repeat the original query and filters.")
+    return offset, version
 
 
 search_courses_spec = types.Tool(
     name="search-courses",
     title="Search Courses",
     description=(
-        "Search courses by query and term filters (Autumn, Winter, Spring, Summer). Returns basic information."
+        "Search courses by query and term filters (Autumn, Winter, Spring, Summer). Returns basic information, one page at a time; pass the returned cursor to fetch the next page."
     ),
     inputSchema={
         "type": "object",
@@ -232,6 +463,16 @@ search_courses_spec = types.Tool(
                 "items": {"type": "string"},
                 "description": "Optional careers: UG, GR, GSB, LAW, MED.",
             },
+            "limit": {
+                "type": "integer",
+                "minimum": 1,
+                "maximum": 100,
+                "description": "Maximum number of results to return (default 25).",
+            },
+            "cursor": {
+                "type": "string",
+                "description": "Opaque cursor from a previous search-courses response, to fetch the next page of the same search.",
+            },
         },
     },
 )
@@ -241,21 +482,52 @@ async def search_courses_handler(arguments: dict[str, Any], ctx: Any) -> list[ty
     if not isinstance(query, str):
         raise TypeError("'query' must be a string.")
 
-    fs = build_filters_from_arguments(arguments, term_field="terms", require_terms=True)
+    with tracing.span("filters"):
+        fs = build_filters_from_arguments(arguments, term_field="terms", require_terms=True)
 
-    api = get_course_connection()
-    courses = api.get_courses_by_query(query, *fs, year=ACADEMIC_YEAR) 
+    limit = arguments.get("limit", DEFAULT_PAGE_SIZE)
+    if isinstance(limit, bool) or not isinstance(limit, int) or not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"'limit' must be an integer between 1 and {MAX_PAGE_SIZE}.")
+    fingerprint = _search_fingerprint(query, fs)
+    offset, cursor_version = _decode_cursor(arguments.get("cursor"), fingerprint)
+
+    courses = await search_courses(query, fs, ACADEMIC_YEAR)
+    version = _result_version(courses)
+    if cursor_version is not None and cursor_version != version:
+        # Pages of the changed list could skip or repeat results
+        raise ValueError("The results of this search have changed since the cursor was issued; repeat the search without a cursor.")
+    page = courses[offset:offset + limit]
+    
+    out = TextWriter()
+    out.write("Note: search-courses is for exploring and finding courses. It returns only summary fields (name, description, units). To retrieve all details about a course (instructors, schedule, requirements, etc.), use the get-course tool.\n\n")
+    if not page:
+        out.write(f"Results: none ({len(courses)} total)")
+        return [types.TextContent(type="text", text=out.getvalue())]
+    out.write(f"Results {offset + 1}-{offset + len(page)} of {len(courses)}:")
     
-    out = "Note: search-courses is for exploring and finding courses. It returns only summary fields (name, description, units). To retrieve all details about a course (instructors, schedule, requirements, etc.), use the get-course tool.\n\nResults:"
+    terms = term_filters(fs)
+    progress_token = getattr(getattr(ctx, "meta", None), "progressToken", None)
+    with tracing.span("format", results=len(page)):
+        for i, c in enumerate(page, 1):
+            out.write("\n\n")
+            out.write(RENDER_CACHE.render(c, ACADEMIC_YEAR, terms, "summary", format_course_summary))
+            if progress_token is not None and (i % PROGRESS_EVERY == 0 or i == len(page)):
+                # Tied to this request so it streams on the request's own SSE response
+                await ctx.session.send_progress_notification(
+                    progress_token, i, len(page), message=f"Formatted {i}/{len(page)} results",
+                    related_request_id=str(ctx.request_id),
+                )
     
-    for c in courses:
-        out += "\n\n" + format_course_summary(c)
+    if offset + len(page) < len(courses):
+        next_cursor = _encode_cursor(offset + len(page), fingerprint, version)
+        out.write(f"\n\nMore results available: call search-courses again with the same arguments and cursor=\"{next_cursor}\".")
         
-    return [types.TextContent(type="text", text=out)]
+    return [types.TextContent(type="text", text=out.getvalue())]
 
 
 def register_all() -> None:
     register_tool(list_schools_spec, list_schools_handler)
     register_tool(list_departments_spec, list_departments_handler)
     register_tool(get_course_spec, get_course_handler)
+    register_tool(get_courses_spec, get_courses_handler)
     register_tool(search_courses_spec, search_courses_handler)
\ No newline at end of file
@@ -1,4 +1,5 @@
-from typing import Any, Dict, Iterable, List, Optional
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
 import explorecourses.filters as filters
 
 
@@ -147,3 +148,142 @@ def build_filters_from_arguments(arguments: Dict[str, Any], *, term_field: str =
     return fs
 
 
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so equivalent queries share a cache key."""
+
+    return " ".join(query.lower().split())
+
+
+def canonical_filters(fs: Iterable[str]) -> tuple:
+    """Order-independent form of a filter token list (e.g. for cache keys)."""
+
+    return tuple(sorted(set(fs)))
+
+
+def term_filters(fs: Iterable[str]) -> tuple:
+    """Canonical subset of `fs` that selects terms (e.g. ``filter-term-Autumn``)."""
+
+    return tuple(sorted({f for f in fs if f.startswith("filter-term-")}))
+
+
+# Local evaluation of filter tokens, used when courses are served from a snapshot
+# instead of being filtered by ExploreCourses itself.
+
+# Start-time windows in minutes after midnight, as documented in explorecourses.filters
+TIME_WINDOWS = {
+    filters.TIME_EARLY_MORNING: (0, 10 * 60),
+    filters.TIME_MORNING: (10 * 60, 12 * 60),
+    filters.TIME_LUNCHTIME: (12 * 60, 14 * 60),
+    filters.TIME_AFTERNOON: (14 * 60, 17 * 60),
+    filters.TIME_EVENING: (17 * 60, 24 * 60),
+}
+
+DAY_NAMES = {
+    filters.DAY_SUNDAY: "Sunday",
+    filters.DAY_MONDAY: "Monday",
+    filters.DAY_TUESDAY: "Tuesday",
+    filters.DAY_WEDNESDAY: "Wednesday",
+    filters.DAY_THURSDAY: "Thursday",
+    filters.DAY_FRIDAY: "Friday",
+    filters.DAY_SATURDAY: "Saturday",
+}
+
+_CLOCK_RE = re.compile(r"^(\d{1,2}):(\d{2})(?::\d{2})?\s*([AP]M)?$", re.IGNORECASE)
+
+
+def _clock_minutes(value: Optional[str]) -> Optional[int]:
+    match = _CLOCK_RE.match((value or "").strip())
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2)), (match.group(3) or "").upper()
+    if meridiem == "PM" and hour != 12:
+        hour += 12
+    elif meridiem == "AM" and hour == 12:
+        hour = 0
+    return hour * 60 + minute
+
+
+def _alnum(value: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", value.lower())
+
+
+def _schedules(course: Any) -> Iterable[Any]:
+    for sec in getattr(course, "sections", ()) or ():
+        yield from getattr(sec, "schedules", ()) or ()
+
+
+def _matches_token(course: Any, token: str) -> bool:
+    group, _, value = token.rpartition("-")
+    if group == "filter-term":
+        return any((getattr(sec, "term", "") or "").endswith(value) for sec in getattr(course, "sections", ()) or ())
+    if group == "filter-ger":
+        return any(_alnum(g) == value.lower() for g in getattr(course, "gers", ()) or ())
+    if group == "filter-units":
+        if value == "gt5":
+            return (getattr(course, "units_max", 0) or 0) > 5
+        return (getattr(course, "units_min", 0) or 0) <= int(value) <= (getattr(course, "units_max", 0) or 0)
+    if group == "filter-time":
+        start, end = TIME_WINDOWS[token]
+        for sched in _schedules(course):
+            minutes = _clock_minutes(getattr(sched, "start_time", None))
+            if minutes is not None and start <= minutes < end:
+                return True
+        return False
+    if group == "filter-day":
+        return any(DAY_NAMES[token] in (getattr(sched, "days", ()) or ()) for sched in _schedules(course))
+    if group == "filter-academiclevel":
+        return getattr(course, "academic_career", None) == value
+    raise ValueError(f"Unsupported filter token for local evaluation: {token!r}")
+
+
+def course_matches_filters(course: Any, fs: Iterable[str]) -> bool:
+    """
+    Evaluate ExploreCourses filter tokens against a parsed course.
+
+    Mirrors the upstream semantics: values within one filter group (e.g. two
+    terms) are OR-ed, and the groups themselves are AND-ed.
+    """
+
+    groups: Dict[str, List[str]] = {}
+    for tok in fs:
+        groups.setdefault(tok.rpartition("-")[0], []).append(tok)
+    return all(any(_matches_token(course, tok) for tok in toks) for toks in groups.values())
+
+
+# Every token the local evaluation understands, for indexing courses by filter
+FILTER_TOKENS = frozenset(
+    [*TERM_MAP.values(), *UG_MAP.values(), *UNITS_MAP.values(), *TIME_MAP.values(), *DAY_MAP.values(), *CAREER_MAP.values()]
+)
+_TERM_TOKENS = [(tok.rpartition("-")[2], tok) for tok in set(TERM_MAP.values())]
+_GER_TOKENS = {_alnum(tok.rpartition("-")[2]): tok for tok in UG_MAP.values()}
+_UNIT_TOKENS = [(int(tok.rpartition("-")[2]), tok) for tok in set(UNITS_MAP.values()) if tok != filters.UNITS_GT5]
+
+
+def course_filter_tokens(course: Any) -> Set[str]:
+    """Every filter token `course` satisfies, in one pass over the record.
+
+    Gives the same answers as ``course_matches_filters`` with a single token.
+    """
+
+    out: Set[str] = set()
+    for sec in getattr(course, "sections", ()) or ():
+        term = getattr(sec, "term", "") or ""
+        out.update(tok for name, tok in _TERM_TOKENS if term.endswith(name))
+    for g in getattr(course, "gers", ()) or ():
+        tok = _GER_TOKENS.get(_alnum(g))
+        if tok is not None:
+            out.add(tok)
+    units_min, units_max = getattr(course, "units_min", 0) or 0, getattr(course, "units_max", 0) or 0
+    out.update(tok for n, tok in _UNIT_TOKENS if units_min <= n <= units_max)
+    if units_max > 5:
+        out.add(filters.UNITS_GT5)
+    for sched in _schedules(course):
+        minutes = _clock_minutes(getattr(sched, "start_time", None))
+        if minutes is not None:
+            out.update(tok for tok, (start, end) in TIME_WINDOWS.items() if start <= minutes < end)
+        days = getattr(sched, "days", ()) or ()
+        out.update(tok for tok, name in DAY_NAMES.items() if name in days)
+    career = getattr(course, "academic_career", None)
+    if career is not None and f"filter-academiclevel-{career}" in FILTER_TOKENS:
+        out.add(f"filter-academiclevel-{career}")
+    return out
@@ -1,10 +1,39 @@
-from typing import Any, Iterable
+from typing import Any, Iterable, List
+
+from .records import (
+    AttributeRecord,
+    CourseRecord,
+    InstructorRecord,
+    ObjectiveRecord,
+    ScheduleRecord,
+    SectionRecord,
+    TagRecord,
+)
+
+# Formatting utilities and course pretty-printer.
+#
+# Every formatter writes into a shared TextWriter and the text is joined once
+# at the end, so building output is linear in its size no matter how deeply
+# sections/schedules/instructors nest. The fmt_* / format_* functions are
+# thin wrappers for callers that want a string. Formatters read CourseRecord
+# fields directly (see records.py).
 
-from explorecourses import Course
+IND = "    "  # 4-space indent
 
-# Formatting utilities and course pretty-printer
 
-IND = "    "  # 4-space indent
+class TextWriter:
+    """Append-only text builder: collects parts and joins them once."""
+
+    __slots__ = ("_parts",)
+
+    def __init__(self):
+        self._parts: List[str] = []
+
+    def write(self, part: str) -> None:
+        self._parts.append(part)
+
+    def getvalue(self) -> str:
+        return "".join(self._parts)
 
 
 def _none_guard(x: Any, fallback: str = "None") -> str:
@@ -17,186 +46,207 @@ def _join(seq: Iterable[Any], sep: str = ", ") -> str:
     return sep.join(str(s) for s in seq)
 
 
-def fmt_objectives(objs: Iterable[Any], indent: str = IND) -> str:
+def write_objectives(w: TextWriter, objs: Iterable[ObjectiveRecord], indent: str = IND) -> None:
     if not objs:
-        return f"{indent}- (none)"
-    lines = []
+        w.write(f"{indent}- (none)")
+        return
+    sep = ""
     for o in objs:
-        code = getattr(o, "code", None)
-        desc = getattr(o, "description", None)
-        if code or desc:
-            lines.append(f"{indent}- {code}: {desc}")
+        if o.code or o.description:
+            w.write(f"{sep}{indent}- {o.code}: {o.description}")
         else:
-            lines.append(f"{indent}- {o}")
-    return "\n".join(lines)
+            w.write(f"{sep}{indent}- Learning Objective ({o.code}: {o.description})")
+        sep = "\n"
 
 
-def fmt_tags(tags: Iterable[Any], indent: str = IND) -> str:
+def write_tags(w: TextWriter, tags: Iterable[TagRecord], indent: str = IND) -> None:
     if not tags:
-        return f"{indent}- (none)"
-    return "\n".join(
-        f"{indent}- {getattr(t, 'organization', '')}::{getattr(t, 'name', '')}"
-        for t in tags
-    )
+        w.write(f"{indent}- (none)")
+        return
+    sep = ""
+    for t in tags:
+        w.write(f"{sep}{indent}- {t.organization}::{t.name}")
+        sep = "\n"
 
 
-def fmt_attributes(attrs: Iterable[Any], indent: str = IND) -> str:
+def write_attributes(w: TextWriter, attrs: Iterable[AttributeRecord], indent: str = IND) -> None:
     if not attrs:
-        return f"{indent}- (none)"
-    out = []
+        w.write(f"{indent}- (none)")
+        return
+    sep = ""
     for a in attrs:
-        name = getattr(a, "name", "")
-        val = getattr(a, "value", "")
-        desc = getattr(a, "description", "")
-        cat = getattr(a, "catalog_print", None)
-        sch = getattr(a, "schedule_print", None)
-        tail = f" — {desc}" if desc else ""
-        flags = []
-        if cat is not None:
-            flags.append(f"catalog_print={cat}")
-        if sch is not None:
-            flags.append(f"schedule_print={sch}")
-        flag_text = f" [{', '.join(flags)}]" if flags else ""
-        out.append(f"{indent}- {name}::{val}{tail}{flag_text}")
-    return "\n".join(out)
-
-
-def fmt_instructors(instrs: Iterable[Any], indent: str = IND) -> str:
+        tail = f" — {a.description}" if a.description else ""
+        flag_text = f" [catalog_print={a.catalog_print}, schedule_print={a.schedule_print}]"
+        w.write(f"{sep}{indent}- {a.name}::{a.value}{tail}{flag_text}")
+        sep = "\n"
+
+
+def write_instructors(w: TextWriter, instrs: Iterable[InstructorRecord], indent: str = IND) -> None:
     if not instrs:
-        return f"{indent}- (none)"
-    lines = []
+        w.write(f"{indent}- (none)")
+        return
+    sep = ""
     for i in instrs:
-        first = getattr(i, "first_name", "") or ""
-        last = getattr(i, "last_name", "") or ""
-        sunet = getattr(i, "sunet_id", "") or ""
-        pi = getattr(i, "is_primary_instructor", None)
-        pi_tag = " (PI)" if pi else ""
-        name_part = f"{first} {last}".strip() or getattr(i, "name", "(unknown)")
-        sunet_part = f" [{sunet}]" if sunet else ""
-        lines.append(f"{indent}- {name_part}{sunet_part}{pi_tag}")
-    return "\n".join(lines)
-
-
-def fmt_schedules(schedules: Iterable[Any], base_indent: str = IND) -> str:
+        pi_tag = " (PI)" if i.is_primary_instructor else ""
+        name_part = f"{i.first_name or ''} {i.last_name or ''}".strip() or i.name
+        sunet_part = f" [{i.sunet_id}]" if i.sunet_id else ""
+        w.write(f"{sep}{indent}- {name_part}{sunet_part}{pi_tag}")
+        sep = "\n"
+
+
+def write_schedules(w: TextWriter, schedules: Iterable[ScheduleRecord], base_indent: str = IND) -> None:
     if not schedules:
-        return f"{base_indent}(none)"
-    lines = []
+        w.write(f"{base_indent}(none)")
+        return
+    i1 = base_indent
+    i2 = base_indent + IND
+    i3 = base_indent + IND * 2
+    sep = ""
     for idx, s in enumerate(schedules, 1):
-        i1 = base_indent
-        i2 = base_indent + IND
-        i3 = base_indent + IND * 2
-        days = _join(getattr(s, "days", ()), sep=", ")
-        lines.append(f"{i1}- Schedule #{idx}:")
-        lines.append(f"{i2}dates: {getattr(s, 'start_date', None)} → {getattr(s, 'end_date', None)}")
-        lines.append(f"{i2}time: {getattr(s, 'start_time', None)} – {getattr(s, 'end_time', None)}")
-        lines.append(f"{i2}location: {getattr(s, 'location', None)}")
-        lines.append(f"{i2}days: {days}")
-        lines.append(f"{i2}instructors:")
-        lines.append(fmt_instructors(getattr(s, "instructors", ()), indent=i3))
-    return "\n".join(lines)
-
-
-def fmt_sections(sections: Iterable[Any], base_indent: str = IND) -> str:
+        w.write(
+            f"{sep}{i1}- Schedule #{idx}:\n"
+            f"{i2}dates: {s.start_date} → {s.end_date}\n"
+            f"{i2}time: {s.start_time} – {s.end_time}\n"
+            f"{i2}location: {s.location}\n"
+            f"{i2}days: {_join(s.days, sep=', ')}\n"
+            f"{i2}instructors:\n"
+        )
+        write_instructors(w, s.instructors, indent=i3)
+        sep = "\n"
+
+
+def write_sections(w: TextWriter, sections: Iterable[SectionRecord], base_indent: str = IND) -> None:
     if not sections:
-        return f"{base_indent}- (none)"
-    out = []
+        w.write(f"{base_indent}- (none)")
+        return
+    i1 = base_indent
+    i2 = base_indent + IND
+    i3 = base_indent + IND * 2
+    sep = ""
     for idx, sec in enumerate(sections, 1):
-        i1 = base_indent
-        i2 = base_indent + IND
-        i3 = base_indent + IND * 2
-        out.append(f"{i1}- Section #{idx}: {getattr(sec, 'component', None)} {getattr(sec, 'section_num', None)} (class_id: {getattr(sec, 'class_id', None)})")
-        out.append(f"{i2}term: {getattr(sec, 'term', None)}")
-        out.append(f"{i2}units: {getattr(sec, 'units', None)}")
-        out.append(f"{i2}enrollment: {getattr(sec, 'curr_class_size', None)}/{getattr(sec, 'max_class_size', None)}")
-        out.append(f"{i2}waitlist: {getattr(sec, 'curr_waitlist_size', None)}/{getattr(sec, 'max_waitlist_size', None)}")
-        notes = getattr(sec, "notes", None)
-        if notes:
-            out.append(f"{i2}notes: {notes}")
-        out.append(f"{i2}schedules:")
-        out.append(fmt_schedules(getattr(sec, "schedules", ()), base_indent=i3))
-        out.append(f"{i2}attributes:")
-        out.append(fmt_attributes(getattr(sec, "attributes", ()), indent=i3))
-    return "\n".join(out)
-
-
-def format_course(course: Any) -> str:
-    return f"""# Course
-course_id: {getattr(course, 'course_id', None)}
-year: {getattr(course, 'year', None)}
-subject: {getattr(course, 'subject', None)}
-code: {getattr(course, 'code', None)}
-title: {getattr(course, 'title', None)}
-description: {getattr(course, 'description', None)}
-gers: {_join(getattr(course, 'gers', ()) or ())}
-repeatable: {getattr(course, 'repeatable', None)}
-grading_basis: {getattr(course, 'grading_basis', None)}
-units_min: {getattr(course, 'units_min', None)}
-units_max: {getattr(course, 'units_max', None)}
-final_exam: {getattr(course, 'final_exam', None)}
-active: {getattr(course, 'active', None)}
-offer_num: {getattr(course, 'offer_num', None)}
-academic_group: {getattr(course, 'academic_group', None)}
-academic_org: {getattr(course, 'academic_org', None)}
-academic_career: {getattr(course, 'academic_career', None)}
-max_units_repeat: {getattr(course, 'max_units_repeat', None)}
-max_times_repeat: {getattr(course, 'max_times_repeat', None)}
+        notes_line = f"{i2}notes: {sec.notes}\n" if sec.notes else ""
+        w.write(
+            f"{sep}{i1}- Section #{idx}: {sec.component} {sec.section_num} (class_id: {sec.class_id})\n"
+            f"{i2}term: {sec.term}\n"
+            f"{i2}units: {sec.units}\n"
+            f"{i2}enrollment: {sec.curr_class_size}/{sec.max_class_size}\n"
+            f"{i2}waitlist: {sec.curr_waitlist_size}/{sec.max_waitlist_size}\n"
+            f"{notes_line}"
+            f"{i2}schedules:\n"
+        )
+        write_schedules(w, sec.schedules, base_indent=i3)
+        w.write(f"\n{i2}attributes:\n")
+        write_attributes(w, sec.attributes, indent=i3)
+        sep = "\n"
+
+
+def fmt_objectives(objs: Iterable[ObjectiveRecord], indent: str = IND) -> str:
+    w = TextWriter()
+    write_objectives(w, objs, indent)
+    return w.getvalue()
+
+
+def fmt_tags(tags: Iterable[TagRecord], indent: str = IND) -> str:
+    w = TextWriter()
+    write_tags(w, tags, indent)
+    return w.getvalue()
+
+
+def fmt_attributes(attrs: Iterable[AttributeRecord], indent: str = IND) -> str:
+    w = TextWriter()
+    write_attributes(w, attrs, indent)
+    return w.getvalue()
+
+
+def fmt_instructors(instrs: Iterable[InstructorRecord], indent: str = IND) -> str:
+    w = TextWriter()
+    write_instructors(w, instrs, indent)
+    return w.getvalue()
+
+
+def fmt_schedules(schedules: Iterable[ScheduleRecord], base_indent: str = IND) -> str:
+    w = TextWriter()
+    write_schedules(w, schedules, base_indent)
+    return w.getvalue()
+
+
+def fmt_sections(sections: Iterable[SectionRecord], base_indent: str = IND) -> str:
+    w = TextWriter()
+    write_sections(w, sections, base_indent)
+    return w.getvalue()
+
+
+def write_course_no_sections(w: TextWriter, course: CourseRecord) -> None:
+    w.write(f"""# Course
+course_id: {course.course_id}
+year: {course.year}
+subject: {course.subject}
+code: {course.code}
+title: {course.title}
+description: {course.description}
+gers: {_join(course.gers)}
+repeatable: {course.repeatable}
+grading_basis: {course.grading_basis}
+units_min: {course.units_min}
+units_max: {course.units_max}
+final_exam: {course.final_exam}
+active: {course.active}
+offer_num: {course.offer_num}
+academic_group: {course.academic_group}
+academic_org: {course.academic_org}
+academic_career: {course.academic_career}
+max_units_repeat: {course.max_units_repeat}
+max_times_repeat: {course.max_times_repeat}
 
 learning_objectives:
-{fmt_objectives(getattr(course, 'objectives', ())) }
-
-tags:
-{fmt_tags(getattr(course, 'tags', ())) }
-
-course_attributes:
-{fmt_attributes(getattr(course, 'attributes', ())) }
-
-sections:
-{fmt_sections(getattr(course, 'sections', ())) }
-"""
-
-
-def format_course_no_sections(course: Any) -> str:
-    return f"""# Course
-course_id: {getattr(course, 'course_id', None)}
-year: {getattr(course, 'year', None)}
-subject: {getattr(course, 'subject', None)}
-code: {getattr(course, 'code', None)}
-title: {getattr(course, 'title', None)}
-description: {getattr(course, 'description', None)}
-gers: {_join(getattr(course, 'gers', ()) or ())}
-repeatable: {getattr(course, 'repeatable', None)}
-grading_basis: {getattr(course, 'grading_basis', None)}
-units_min: {getattr(course, 'units_min', None)}
-units_max: {getattr(course, 'units_max', None)}
-final_exam: {getattr(course, 'final_exam', None)}
-active: {getattr(course, 'active', None)}
-offer_num: {getattr(course, 'offer_num', None)}
-academic_group: {getattr(course, 'academic_group', None)}
-academic_org: {getattr(course, 'academic_org', None)}
-academic_career: {getattr(course, 'academic_career', None)}
-max_units_repeat: {getattr(course, 'max_units_repeat', None)}
-max_times_repeat: {getattr(course, 'max_times_repeat', None)}
+""")
+    write_objectives(w, course.objectives)
+    w.write("\n\ntags:\n")
+    write_tags(w, course.tags)
+    w.write("\n\ncourse_attributes:\n")
+    write_attributes(w, course.attributes)
+    w.write("\n")
+
+
+def write_course_sections(w: TextWriter, course: CourseRecord) -> None:
+    w.write("sections:\n")
+    write_sections(w, course.sections)
+    w.write("\n")
+
+
+def write_course(w: TextWriter, course: CourseRecord) -> None:
+    write_course_no_sections(w, course)
+    w.write("\n")
+    write_course_sections(w, course)
 
-learning_objectives:
-{fmt_objectives(getattr(course, 'objectives', ())) }
 
-tags:
-{fmt_tags(getattr(course, 'tags', ())) }
+def format_course(course: CourseRecord) -> str:
+    w = TextWriter()
+    write_course(w, course)
+    return w.getvalue()
 
-course_attributes:
-{fmt_attributes(getattr(course, 'attributes', ())) }
-"""
 
+def format_course_no_sections(course: CourseRecord) -> str:
+    w = TextWriter()
+    write_course_no_sections(w, course)
+    return w.getvalue()
 
-def format_course_sections(course: Any) -> str:
-    return f"""sections:
-{fmt_sections(getattr(course, 'sections', ())) }
-"""
 
-def format_course_summary(course: Course) -> str:
+def format_course_sections(course: CourseRecord) -> str:
+    w = TextWriter()
+    write_course_sections(w, course)
+    return w.getvalue()
+
+
+def write_course_summary(w: TextWriter, course: CourseRecord) -> None:
     desc = course.description
     if len(desc) > 500:
         desc = desc[:497] + "..." + " (description clipped, fetch with get-course tool for full details)"
     units = str(course.units_max) if course.units_max == course.units_min else f"{course.units_min} - {course.units_max}"
-    header = f"{course.subject + course.code} | course_id: {course.course_id} | {units} units"
-    return header + f"\n{course.title}" + f"\n\n{desc}\n"
+    w.write(f"{course.subject + course.code} | course_id: {course.course_id} | {units} units\n{course.title}\n\n{desc}\n")
+
+
+def format_course_summary(course: CourseRecord) -> str:
+    w = TextWriter()
+    write_course_summary(w, course)
+    return w.getvalue()
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+import httpx
+
+from metrics import register_collector
+from .settings import SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailable(RuntimeError):
+    """ExploreCourses is not being called: the circuit is open or the queue deadline passed."""
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Errors that mean ExploreCourses is struggling (as opposed to a bad request)."""
+
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return isinstance(exc, httpx.TransportError)
+
+
+class UpstreamGate:
+    """Adaptive concurrency limit, bounded wait queue and circuit breaker for upstream calls.
+
+    - The in-flight limit follows AIMD between UPSTREAM_MIN_LIMIT and
+      UPSTREAM_MAX_LIMIT: +1 per limit's worth of fast successes, x`backoff`
+      (at most once per UPSTREAM_LATENCY_TARGET) on a failure or a response
+      slower than UPSTREAM_LATENCY_TARGET.
+    - Callers over the limit wait FIFO for at most UPSTREAM_QUEUE_TIMEOUT.
+    - After CIRCUIT_FAILURE_THRESHOLD consecutive failures the circuit opens
+      and calls fail fast with UpstreamUnavailable. After
+      CIRCUIT_OPEN_SECONDS a single probe is let through; its outcome closes
+      or re-opens the circuit. Requests admitted before the circuit opened do
+      not count as the probe.
+    """
+
+    def __init__(self, backoff: float = 0.7):
+        self.backoff = backoff
+        self._limit: Optional[float] = None
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self.state = "closed"
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def limit(self) -> float:
+        # Read lazily so .env settings loaded after import apply
+        if self._limit is None:
+            self._limit = float(SETTINGS.upstream_initial_limit)
+        return self._limit
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _capacity(self) -> int:
+        return max(1, int(self.limit))
+
+    def _check_circuit(self) -> bool:
+        """Raise while the circuit is open; return True if this call is the half-open probe."""
+
+        if self.state == "closed":
+            return False
+        now = time.monotonic()
+        if self.state == "open" and now >= self._open_until:
+            self.state = "half_open"
+        if self.state == "open" or self._probing:
+            self.rejected += 1
+            retry = max(0.0, self._open_until - now)
+            raise UpstreamUnavailable(
+                f"ExploreCourses is temporarily unavailable after repeated failures; retry in about {retry:.0f}s."
+            )
+        self._probing = True
+        return True
+
+    async def _acquire(self) -> None:
+        if self.inflight < self._capacity() and not self._waiters:
+            self.inflight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(fut, SETTINGS.upstream_queue_timeout)
+        except BaseException as exc:
+            if fut.done() and not fut.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self._release_slot()
+            if isinstance(exc, asyncio.TimeoutError):
+                self.timeouts += 1
+                raise UpstreamUnavailable(
+                    f"ExploreCourses is overloaded; no upstream slot freed up within {SETTINGS.upstream_queue_timeout:g}s."
+                ) from None
+            raise
+        finally:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+
+    def _release_slot(self) -> None:
+        self.inflight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.inflight < self._capacity():
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.inflight += 1
+                fut.set_result(None)
+
+    def _record(self, failed: bool, latency: float, probe: bool) -> None:
+        now = time.monotonic()
+        target = SETTINGS.upstream_latency_target
+        if failed or latency > target:
+            if now - self._last_decrease >= target:
+                self._limit = max(float(SETTINGS.upstream_min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+        else:
+            self._limit = min(float(SETTINGS.upstream_max_limit), self.limit + 1.0 / self._capacity())
+            self._wake()
+
+        if probe:
+            self._probing = False
+            if failed:
+                self._trip(now)
+            else:
+                logger.info("Upstream circuit closed")
+                self.state = "closed"
+                self._failures = 0
+            return
+        if failed:
+            self._failures += 1
+            if self.state == "closed" and self._failures >= SETTINGS.circuit_failure_threshold:
+                self._trip(now)
+        else:
+            self._failures = 0
+
+    def _trip(self, now: float) -> None:
+        logger.warning("Upstream circuit open for %gs after %d consecutive failures", SETTINGS.circuit_open_seconds, self._failures)
+        self.state = "open"
+        self._open_until = now + SETTINGS.circuit_open_seconds
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one upstream slot for the duration of a request."""
+
+        probe = self._check_circuit()
+        try:
+            await self._acquire()
+        except BaseException:
+            if probe:
+                self._probing = False
+            raise
+        started = time.monotonic()
+        failed: Optional[bool] = None
+        try:
+            yield
+            failed = False
+        except Exception as exc:
+            failed = is_upstream_failure(exc)
+            raise
+        finally:
+            if failed is None:
+                # Cancelled: no verdict on upstream health
+                if probe:
+                    self._probing = False
+            else:
+                self._record(failed, time.monotonic() - started, probe)
+            self._release_slot()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit": self.limit,
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "open": 0 if self.state == "closed" else 1,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+
+# Shared by every AsyncCourseConnection in the process
+UPSTREAM_GATE = UpstreamGate()
+
+
+def _gate_metrics() -> list:
+    stats = UPSTREAM_GATE.stats()
+    return [
+        ("explorecourses_concurrency_limit", "gauge", "Current adaptive in-flight limit for ExploreCourses requests.", [("", {}, stats["limit"])]),
+        ("explorecourses_inflight", "gauge", "ExploreCourses requests in flight.", [("", {}, stats["inflight"])]),
+        ("explorecourses_queued", "gauge", "Requests waiting for an upstream slot.", [("", {}, stats["queued"])]),
+        ("explorecourses_circuit_open", "gauge", "1 while the upstream circuit breaker is open or half-open.", [("", {}, stats["open"])]),
+        ("explorecourses_rejected_total", "counter", "Requests failed fast because the circuit was open.", [("", {}, stats["rejected"])]),
+        ("explorecourses_queue_timeouts_total", "counter", "Requests that gave up waiting for an upstream slot.", [("", {}, stats["timeouts"])]),
+    ]
+
+
+register_collector(_gate_metrics)
@@ -0,0 +1,347 @@
+import asyncio
+import re
+import time
+from bisect import bisect_left
+from dataclasses import replace
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .cache import Loader, Revalidator, backend_get, backend_set_many, monotonic_from_wall
+from .filtering import FILTER_TOKENS, course_filter_tokens
+from .render import RENDER_CACHE
+from .settings import SETTINGS
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Relative weight of a query token hit in each indexed field
+FIELD_WEIGHTS = {
+    "code": 8,
+    "title": 5,
+    "instructors": 3,
+    "gers": 2,
+    "description": 1,
+}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def _course_fields(course: Any) -> Dict[str, List[str]]:
+    subject = getattr(course, "subject", "") or ""
+    code = getattr(course, "code", "") or ""
+    instructors: List[str] = []
+    for sec in getattr(course, "sections", ()) or ():
+        for sched in getattr(sec, "schedules", ()) or ():
+            for i in getattr(sched, "instructors", ()) or ():
+                instructors.extend(tokenize(getattr(i, "name", None)))
+                instructors.extend(tokenize(getattr(i, "first_name", None)))
+                instructors.extend(tokenize(getattr(i, "last_name", None)))
+                instructors.extend(tokenize(getattr(i, "sunet_id", None)))
+    gers: List[str] = []
+    for g in getattr(course, "gers", ()) or ():
+        gers.extend(tokenize(g))
+        gers.append("".join(tokenize(g)))
+    return {
+        # "CS 106A", "cs106a" and "106a" should all find CS106A
+        "code": tokenize(subject) + tokenize(code) + ["".join(tokenize(subject + code))],
+        "title": tokenize(getattr(course, "title", None)),
+        "instructors": instructors,
+        "gers": gers,
+        "description": tokenize(getattr(course, "description", None)),
+    }
+
+
+def _metadata_only(course: Any) -> Any:
+    return replace(course, sections=()) if course.sections else course
+
+
+class CourseIdIndex:
+    """Process-wide ``(year, course_id) -> course`` map.
+
+    Filled from every get-course lookup and snapshot load, so repeated
+    get-course calls can usually answer without touching the network.
+    Records are written through to the shared cache backend (namespace
+    "course", refreshed sections under "sections") unless they come from a
+    snapshot, which is already persisted on its own. ``get`` only consults
+    records held in this process; ``aget`` and ``get_stale`` first load a
+    missing record from the backend in a worker thread.
+
+    A record is cached as two components with their own load times: its
+    metadata (title, description, GERs, attributes), which changes about once
+    a year and expires after COURSE_METADATA_TTL, and its sections, whose
+    enrollment and waitlist counts move hourly during registration and expire
+    after COURSE_SECTIONS_TTL. ``get`` assembles the record from both;
+    ``add_sections`` replaces only the sections. The metadata of snapshot
+    records stays until the snapshot sync replaces it; their sections are
+    timed from the snapshot's creation and refreshed like live ones, but
+    served however old while a refresh fails.
+    """
+
+    def __init__(self):
+        # Assembled records, and their metadata alone (with no sections)
+        self._courses: Dict[tuple, Any] = {}
+        self._metadata: Dict[tuple, Any] = {}
+        # Component load times; snapshot records have no metadata time
+        self._metadata_at: Dict[tuple, float] = {}
+        self._sections_at: Dict[tuple, float] = {}
+        self._revalidator = Revalidator("course")
+
+    def __len__(self) -> int:
+        return len(self._courses)
+
+    async def _load_from_backend(self, key: tuple) -> Optional[Any]:
+        stored, sections = await asyncio.gather(backend_get("course", key), backend_get("sections", key))
+        if key in self._courses:
+            # Indexed while the backend was read; that copy is at least as new
+            return self._courses[key]
+        if stored is None:
+            return None
+        course = stored[0]
+        self._metadata[key] = _metadata_only(course)
+        self._metadata_at[key] = self._sections_at[key] = monotonic_from_wall(stored[1])
+        if sections is not None and sections[1] > stored[1]:
+            course = replace(course, sections=sections[0])
+            self._sections_at[key] = monotonic_from_wall(sections[1])
+        self._courses[key] = course
+        return course
+
+    def get(self, year: str, course_id: int, revalidate: Optional[Loader] = None) -> Optional[Any]:
+        """Return the indexed course if both components are fresh, or within
+        their stale grace windows when `revalidate` is given; `revalidate`
+        then reloads a batch of courses for `year` in the background, of
+        which only the sections are kept unless the metadata is stale too.
+        Snapshot records are always returned."""
+
+        key = (year, course_id)
+        course = self._courses.get(key)
+        if course is None:
+            return None
+        now = time.monotonic()
+        sections_stale = now - self._sections_at[key] >= SETTINGS.course_sections_ttl
+        metadata_at = self._metadata_at.get(key)
+        if metadata_at is None:
+            if sections_stale and revalidate is not None:
+                self._revalidator.schedule(key, revalidate, lambda courses: self.add_sections(year, courses))
+            return course
+        metadata_stale = now - metadata_at >= SETTINGS.course_metadata_ttl
+        if not metadata_stale and not sections_stale:
+            return course
+        if revalidate is None:
+            return None
+        if now - metadata_at >= SETTINGS.course_metadata_ttl + SETTINGS.course_metadata_stale_grace:
+            return None
+        if now - self._sections_at[key] >= SETTINGS.course_sections_ttl + SETTINGS.course_sections_stale_grace:
+            return None
+        if metadata_stale:
+            self._revalidator.schedule(key, revalidate, lambda courses: self.add_all(year, courses))
+        else:
+            self._revalidator.schedule(key, revalidate, lambda courses: self.add_sections(year, courses))
+        return course
+
+    async def aget(self, year: str, course_id: int, revalidate: Optional[Loader] = None) -> Optional[Any]:
+        """``get``, first loading a course missing locally from the shared cache backend."""
+
+        key = (year, course_id)
+        if key not in self._courses:
+            await self._load_from_backend(key)
+        return self.get(year, course_id, revalidate)
+
+    async def get_stale(self, year: str, course_id: int) -> Optional[Any]:
+        """Return the indexed course however old its components are, or None."""
+
+        key = (year, course_id)
+        return self._courses.get(key) or await self._load_from_backend(key)
+
+    def metadata(self, year: str, course_id: int) -> Optional[Any]:
+        """The indexed course's metadata as a record without sections; it
+        stays the same object across sections refreshes."""
+
+        return self._metadata.get((year, course_id))
+
+    def add_all(
+        self, year: str, courses: Iterable[Any], persist: bool = True, sections_stored_at: Optional[float] = None
+    ) -> None:
+        """Index full records. Live records (`persist`) are written through to
+        the backend; snapshot records get no metadata expiry. Sections are
+        timed from `sections_stored_at` (wall clock), or from now."""
+
+        items = [((year, course.course_id), course) for course in courses]
+        changed = [(key, course) for key, course in items if self._courses.get(key) is not course]
+        # Rendered text of a replaced record is stale
+        RENDER_CACHE.invalidate(year, [key[1] for key, _ in changed if key in self._courses])
+        self._courses.update(changed)
+        self._metadata.update((key, _metadata_only(course)) for key, course in changed)
+        now = time.monotonic()
+        sections_at = now if sections_stored_at is None else monotonic_from_wall(sections_stored_at)
+        self._sections_at.update((key, sections_at) for key, _ in items)
+        if persist:
+            self._metadata_at.update((key, now) for key, _ in items)
+            backend_set_many("course", items)
+        else:
+            for key, _ in items:
+                self._metadata_at.pop(key, None)
+
+    def add_sections(self, year: str, courses: Iterable[Any]) -> None:
+        """Take only the sections of `courses` into the records already
+        indexed; their metadata and its load time are left as they are."""
+
+        now = time.monotonic()
+        items, replaced = [], []
+        for course in courses:
+            key = (year, course.course_id)
+            if key not in self._courses:
+                continue
+            if self._courses[key].sections != course.sections:
+                self._courses[key] = replace(self._metadata[key], sections=course.sections)
+                replaced.append(course.course_id)
+            self._sections_at[key] = now
+            items.append((key, course.sections))
+        RENDER_CACHE.invalidate(year, replaced, variants=("sections",))
+        backend_set_many("sections", items)
+
+    def discard(self, year: str, course_ids: Iterable[int]) -> None:
+        """Drop courses that left the catalog, with their rendered text."""
+
+        course_ids = list(course_ids)
+        for course_id in course_ids:
+            key = (year, course_id)
+            self._courses.pop(key, None)
+            self._metadata.pop(key, None)
+            self._metadata_at.pop(key, None)
+            self._sections_at.pop(key, None)
+        RENDER_CACHE.invalidate(year, course_ids)
+
+    def clear(self) -> None:
+        self._courses.clear()
+        self._metadata.clear()
+        self._metadata_at.clear()
+        self._sections_at.clear()
+        RENDER_CACHE.clear()
+
+
+COURSE_INDEX = CourseIdIndex()
+
+
+class SearchIndex:
+    """In-memory inverted index over course subject/code, title, description,
+    instructors and GERs.
+
+    Every query token must match (as a whole token or a prefix of one);
+    results are ranked by summed field weights, then by subject and code.
+    Filter tokens (term, GER, units, time, day, career) have posting sets of
+    their own, built with ``course_filter_tokens``: tokens of one group are
+    OR-ed and groups AND-ed, as ``course_matches_filters`` does.
+    """
+
+    def __init__(self, courses: Iterable[Any] = ()):
+        self._courses: Dict[int, Any] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._filters: Dict[str, Set[int]] = {}
+        self._vocab: Optional[List[str]] = None
+        for course in courses:
+            self.add(course)
+
+    def __len__(self) -> int:
+        return len(self._courses)
+
+    def __contains__(self, course_id: int) -> bool:
+        return course_id in self._courses
+
+    def get(self, course_id: int) -> Optional[Any]:
+        return self._courses.get(course_id)
+
+    def courses(self) -> Iterable[Any]:
+        return self._courses.values()
+
+    def add(self, course: Any) -> None:
+        course_id = course.course_id
+        if course_id in self._courses:
+            self.remove(course_id)
+        self._courses[course_id] = course
+        for field, tokens in _course_fields(course).items():
+            weight = FIELD_WEIGHTS[field]
+            for tok in tokens:
+                postings = self._postings.get(tok)
+                if postings is None:
+                    postings = self._postings[tok] = {}
+                    self._vocab = None
+                postings[course_id] = max(postings.get(course_id, 0), weight)
+        for tok in course_filter_tokens(course):
+            self._filters.setdefault(tok, set()).add(course_id)
+
+    def remove(self, course_id: int) -> None:
+        course = self._courses.pop(course_id, None)
+        if course is None:
+            return
+        for tokens in _course_fields(course).values():
+            for tok in tokens:
+                postings = self._postings.get(tok)
+                if postings is None:
+                    continue
+                postings.pop(course_id, None)
+                if not postings:
+                    del self._postings[tok]
+                    self._vocab = None
+        for tok in course_filter_tokens(course):
+            self._filters[tok].discard(course_id)
+
+    def _expand(self, token: str) -> List[str]:
+        if self._vocab is None:
+            self._vocab = sorted(self._postings)
+        vocab = self._vocab
+        out = []
+        i = bisect_left(vocab, token)
+        while i < len(vocab) and vocab[i].startswith(token):
+            out.append(vocab[i])
+            i += 1
+        return out
+
+    def _match(self, token: str) -> Dict[int, float]:
+        exact = self._postings.get(token)
+        scores: Dict[int, float] = dict(exact) if exact else {}
+        for tok in self._expand(token):
+            if tok == token:
+                continue
+            for course_id, weight in self._postings[tok].items():
+                # Prefix hits rank below whole-token hits in the same field
+                if scores.get(course_id, 0) < weight - 0.5:
+                    scores[course_id] = weight - 0.5
+        return scores
+
+    def _filter_groups(self, fs: Iterable[str]) -> List[List[Set[int]]]:
+        groups: Dict[str, List[Set[int]]] = {}
+        for tok in fs:
+            if tok not in FILTER_TOKENS:
+                raise ValueError(f"Unsupported filter token for local evaluation: {tok!r}")
+            groups.setdefault(tok.rpartition("-")[0], []).append(self._filters.get(tok, set()))
+        return list(groups.values())
+
+    def search(self, query: str, fs: Iterable[str] = ()) -> List[Any]:
+        tokens = list(dict.fromkeys(tokenize(query)))
+        groups = self._filter_groups(fs)
+
+        if tokens:
+            scores: Optional[Dict[int, float]] = None
+            # Narrow with the rarest token first to keep intersections small
+            for matches in sorted((self._match(t) for t in tokens), key=len):
+                if scores is None:
+                    scores = dict(matches)
+                else:
+                    scores = {cid: s + matches[cid] for cid, s in scores.items() if cid in matches}
+                if not scores:
+                    return []
+            candidates: Dict[int, float] = scores or {}
+        elif groups:
+            # Start from the smallest filter group instead of the whole catalog
+            smallest = min(groups, key=lambda g: sum(len(ids) for ids in g))
+            candidates = dict.fromkeys(set().union(*smallest), 0)
+        else:
+            candidates = dict.fromkeys(self._courses, 0)
+
+        hits = [
+            self._courses[cid]
+            for cid in candidates
+            if all(any(cid in ids for ids in group) for group in groups)
+        ]
+        hits.sort(key=lambda c: (-candidates[c.course_id], c.subject or "", c.code or "", c.course_id))
+        return hits
@@ -0,0 +1,148 @@
+import io
+import xml.etree.ElementTree as ET
+from typing import Iterator, List, Optional, Union
+from xml.etree.ElementTree import Element
+
+from .records import (
+    AttributeRecord,
+    CourseRecord,
+    CourseSummary,
+    InstructorRecord,
+    ObjectiveRecord,
+    ScheduleRecord,
+    SectionRecord,
+    TagRecord,
+    intern,
+    share,
+)
+
+# Streaming parser for ExploreCourses search responses.
+#
+# Courses are read with iterparse and each <course> element is cleared as soon
+# as its record is built, so peak memory stays at roughly one course instead
+# of the whole document tree. Records are built straight from the elements,
+# with the same field semantics as explorecourses.classes.Course; a missing
+# required field raises, as it does there. Summary mode reads only
+# what search results show and skips sections, schedules and instructors.
+
+
+def _instructor(elem: Element, year: Optional[str]) -> InstructorRecord:
+    return share(InstructorRecord(
+        intern(elem.findtext("name")),
+        intern(elem.findtext("firstName")),
+        intern(elem.findtext("middleName")),
+        intern(elem.findtext("lastName")),
+        intern(elem.findtext("sunet")),
+        elem.findtext("role") == "PI",
+    ), year)
+
+
+def _attribute(elem: Element, year: Optional[str]) -> AttributeRecord:
+    return share(AttributeRecord(
+        intern(elem.findtext("name")),
+        intern(elem.findtext("value")),
+        intern(elem.findtext("description")),
+        elem.findtext("catalogPrint") == "true",
+        elem.findtext("schedulePrint") == "true",
+    ), year)
+
+
+def _schedule(elem: Element, year: Optional[str]) -> ScheduleRecord:
+    return ScheduleRecord(
+        intern(elem.findtext("startDate")),
+        intern(elem.findtext("endDate")),
+        intern(elem.findtext("startTime")),
+        intern(elem.findtext("endTime")),
+        intern(elem.findtext("location")),
+        share(tuple(intern(d) for d in elem.findtext("days").split()), year),
+        share(tuple(_instructor(i, year) for i in elem.find("instructors")), year),
+    )
+
+
+def _section(elem: Element, year: Optional[str]) -> SectionRecord:
+    return SectionRecord(
+        int(elem.findtext("classId")),
+        intern(elem.findtext("term")),
+        intern(elem.findtext("units")),
+        intern(elem.findtext("sectionNumber")),
+        intern(elem.findtext("component")),
+        int(elem.findtext("currentClassSize")),
+        int(elem.findtext("maxClassSize")),
+        int(elem.findtext("currentWaitlistSize")),
+        int(elem.findtext("maxWaitlistSize")),
+        elem.findtext("notes"),
+        tuple(_schedule(s, year) for s in elem.find("schedules")),
+        share(tuple(_attribute(a, year) for a in elem.find("attributes")), year),
+    )
+
+
+def _flag(value: Optional[str], yes: str, no: str) -> Optional[bool]:
+    return True if value == yes else False if value == no else None
+
+
+def course_record(elem: Element) -> CourseRecord:
+    """Build a full CourseRecord from a <course> element."""
+
+    admin = elem.find("administrativeInformation")
+    year = intern(elem.findtext("year"))
+    return CourseRecord(
+        course_id=int(admin.findtext("courseId")),
+        year=year,
+        subject=intern(elem.findtext("subject")),
+        code=intern(elem.findtext("code")),
+        title=elem.findtext("title"),
+        description=elem.findtext("description"),
+        gers=share(tuple(intern(g) for g in elem.findtext("gers").split(", ")), year),
+        repeatable=elem.findtext("repeatable") == "true",
+        grading_basis=intern(elem.findtext("grading")),
+        units_min=int(elem.findtext("unitsMin")),
+        units_max=int(elem.findtext("unitsMax")),
+        final_exam=_flag(admin.findtext("finalExamFlag"), "Y", "N"),
+        active=_flag(admin.findtext("effectiveStatus"), "A", "I"),
+        offer_num=intern(admin.findtext("offerNumber")),
+        academic_group=intern(admin.findtext("academicGroup")),
+        academic_org=intern(admin.findtext("academicOrganization")),
+        academic_career=intern(admin.findtext("academicCareer")),
+        max_units_repeat=int(admin.findtext("maxUnitsRepeat")),
+        max_times_repeat=int(admin.findtext("maxTimesRepeat")),
+        objectives=share(tuple(
+            share(ObjectiveRecord(intern(o.findtext(".//requirementCode")), o.findtext(".//description")), year)
+            for o in elem.find("learningObjectives")
+        ), year),
+        tags=share(tuple(
+            share(TagRecord(intern(t.findtext("organization")), intern(t.findtext("name"))), year)
+            for t in elem.find("tags")
+        ), year),
+        attributes=share(tuple(_attribute(a, year) for a in elem.find("attributes")), year),
+        sections=tuple(_section(s, year) for s in elem.find("sections")),
+    )
+
+
+def course_summary(elem: Element) -> CourseSummary:
+    """Build a CourseSummary from a <course> element, ignoring its sections."""
+
+    admin = elem.find("administrativeInformation")
+    return CourseSummary(
+        course_id=int(admin.findtext("courseId")),
+        year=intern(elem.findtext("year")),
+        subject=intern(elem.findtext("subject")),
+        code=intern(elem.findtext("code")),
+        title=elem.findtext("title"),
+        description=elem.findtext("description"),
+        units_min=int(elem.findtext("unitsMin")),
+        units_max=int(elem.findtext("unitsMax")),
+    )
+
+
+def iter_courses(content: bytes, summary: bool = False) -> Iterator[Union[CourseRecord, CourseSummary]]:
+    """Yield one record per <course> in a search response, clearing elements as it goes."""
+
+    build = course_summary if summary else course_record
+    for _, elem in ET.iterparse(io.BytesIO(content)):
+        if elem.tag == "course":
+            yield build(elem)
+            elem.clear()
+
+
+def parse_courses(content: bytes, summary: bool = False) -> List[Union[CourseRecord, CourseSummary]]:
+    return list(iter_courses(content, summary))
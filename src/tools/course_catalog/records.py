@@ -0,0 +1,144 @@
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Compact, immutable course records used everywhere downstream of the parser.
+#
+# The explorecourses classes keep a per-instance __dict__ for every course,
+# section, schedule, instructor, attribute and tag. These records use
+# __slots__, intern the short strings that repeat across the catalog
+# (subjects, terms, components, locations, days, names) and share identical
+# leaf records (instructors, attributes, tags, objectives, day tuples)
+# between courses. Field names match the explorecourses classes.
+
+
+@dataclass(frozen=True, slots=True)
+class InstructorRecord:
+    name: Optional[str]
+    first_name: Optional[str]
+    middle_name: Optional[str]
+    last_name: Optional[str]
+    sunet_id: Optional[str]
+    is_primary_instructor: bool
+
+
+@dataclass(frozen=True, slots=True)
+class AttributeRecord:
+    name: Optional[str]
+    value: Optional[str]
+    description: Optional[str]
+    catalog_print: bool
+    schedule_print: bool
+
+
+@dataclass(frozen=True, slots=True)
+class TagRecord:
+    organization: Optional[str]
+    name: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class ObjectiveRecord:
+    code: Optional[str]
+    description: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduleRecord:
+    start_date: Optional[str]
+    end_date: Optional[str]
+    start_time: Optional[str]
+    end_time: Optional[str]
+    location: Optional[str]
+    days: Tuple[str, ...]
+    instructors: Tuple[InstructorRecord, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class SectionRecord:
+    class_id: int
+    term: Optional[str]
+    units: Optional[str]
+    section_num: Optional[str]
+    component: Optional[str]
+    curr_class_size: int
+    max_class_size: int
+    curr_waitlist_size: int
+    max_waitlist_size: int
+    notes: Optional[str]
+    schedules: Tuple[ScheduleRecord, ...]
+    attributes: Tuple[AttributeRecord, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class CourseRecord:
+    course_id: int
+    year: Optional[str]
+    subject: Optional[str]
+    code: Optional[str]
+    title: Optional[str]
+    description: Optional[str]
+    gers: Tuple[str, ...]
+    repeatable: bool
+    grading_basis: Optional[str]
+    units_min: int
+    units_max: int
+    final_exam: Optional[bool]
+    active: Optional[bool]
+    offer_num: Optional[str]
+    academic_group: Optional[str]
+    academic_org: Optional[str]
+    academic_career: Optional[str]
+    max_units_repeat: int
+    max_times_repeat: int
+    objectives: Tuple[ObjectiveRecord, ...]
+    tags: Tuple[TagRecord, ...]
+    attributes: Tuple[AttributeRecord, ...]
+    sections: Tuple[SectionRecord, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class CourseSummary:
+    """The subset of a course that search results show (see format_course_summary)."""
+
+    course_id: int
+    year: Optional[str]
+    subject: Optional[str]
+    code: Optional[str]
+    title: Optional[str]
+    description: Optional[str]
+    units_min: int
+    units_max: int
+
+
+# Canonical copy of every leaf record / small tuple seen so far, per academic
+# year. Each table is bounded by the distinct values in that year's catalog;
+# use_snapshot clears its year's table when it replaces the snapshot.
+_shared: Dict[Optional[str], Dict[Any, Any]] = {}
+
+
+def approx_size(courses: Iterable[Any]) -> int:
+    """Rough byte estimate of a parsed result list, dominated by its text fields."""
+
+    size = 64
+    for c in courses:
+        size += 256 + len(c.title or "") + len(c.description or "")
+        size += 320 * len(getattr(c, "sections", ()))
+    return size
+
+
+def share(value: Any, year: Optional[str]) -> Any:
+    table = _shared.get(year)
+    if table is None:
+        table = _shared.setdefault(year, {})
+    return table.setdefault(value, value)
+
+
+def clear_shared(year: Optional[str]) -> None:
+    """Forget the canonical values of `year`; records already built keep theirs."""
+
+    _shared.pop(year, None)
+
+
+def intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
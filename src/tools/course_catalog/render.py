@@ -0,0 +1,80 @@
+import math
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+
+from .cache import LRUCache
+from .settings import SETTINGS
+
+
+class RenderCache:
+    """Formatted course text keyed by (course_id, year, term filter set, variant).
+
+    Each entry remembers the object it was rendered from (the record, or the
+    component of it passed as `source`), and a lookup with a different object
+    (the course was re-fetched, or reloaded from a snapshot or the backend)
+    renders again. ``invalidate`` also drops every
+    variant of a course eagerly when COURSE_INDEX takes in a new record, so
+    replaced records are not kept alive by their text.
+    """
+
+    def __init__(self):
+        self._cache = LRUCache(
+            ttl=lambda: math.inf,
+            max_entries=lambda: SETTINGS.render_cache_max_entries,
+            max_bytes=lambda: SETTINGS.render_cache_max_bytes,
+            sizeof=lambda entry: 128 + len(entry[1]),
+            name="render",
+            on_evict=self._forget,
+        )
+        self._keys: Dict[tuple, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def render(
+        self, course: Any, year: str, terms: tuple, variant: str, fn: Callable[[Any], str], source: Any = None
+    ) -> str:
+        key = (course.course_id, year, terms, variant)
+        source = course if source is None else source
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] is source:
+            return entry[1]
+        text = fn(course)
+        self._cache.put(key, (source, text))
+        if key in self._cache:
+            self._keys.setdefault((year, course.course_id), set()).add(key)
+        return text
+
+    def _forget(self, key: tuple) -> None:
+        # Keep _keys in step with the LRU: drop evicted keys and empty sets
+        course_id, year = key[0], key[1]
+        held = self._keys.get((year, course_id))
+        if held is not None:
+            held.discard(key)
+            if not held:
+                del self._keys[(year, course_id)]
+
+    def invalidate(self, year: str, course_ids: Iterable[int], variants: Optional[Iterable[str]] = None) -> None:
+        """Drop the rendered text of `course_ids`, only of `variants` if given."""
+
+        variants = None if variants is None else set(variants)
+        for course_id in course_ids:
+            if variants is None:
+                keys = self._keys.pop((year, course_id), ())
+            else:
+                held = self._keys.get((year, course_id), set())
+                keys = {k for k in held if k[3] in variants}
+                held -= keys
+                if not held:
+                    self._keys.pop((year, course_id), None)
+            for key in keys:
+                self._cache.discard(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._keys.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+
+RENDER_CACHE = RenderCache()
@@ -0,0 +1,95 @@
+from dataclasses import dataclass, field, fields
+from typing import get_type_hints
+
+from starlette.config import Config
+
+# Academic year every catalog tool queries
+ACADEMIC_YEAR = "2025-2026"
+
+# Accepted CACHE_BACKEND values
+CACHE_BACKENDS = ("memory", "sqlite")
+
+
+@dataclass
+class CatalogSettings:
+    """Tunables for the course catalog tools.
+
+    Defaults are used as-is unless ``load_settings`` is called with a Config,
+    in which case each field is read from the env var named in its metadata.
+    """
+
+    explorecourses_url: str = field(default="https://explorecourses.stanford.edu/", metadata={"env": "EXPLORECOURSES_URL"})
+    schools_ttl: float = field(default=6 * 60 * 60, metadata={"env": "SCHOOLS_CACHE_TTL"})
+    query_cache_ttl: float = field(default=15 * 60, metadata={"env": "QUERY_CACHE_TTL"})
+    # get-course records are cached in two tiers: metadata (title, description,
+    # GERs, attributes) changes yearly, sections carry hourly enrollment counts.
+    # Snapshot records keep their metadata until the snapshot sync replaces it,
+    # but their sections are refreshed after COURSE_SECTIONS_TTL like live ones
+    course_metadata_ttl: float = field(default=24 * 60 * 60, metadata={"env": "COURSE_METADATA_TTL"})
+    course_sections_ttl: float = field(default=15 * 60, metadata={"env": "COURSE_SECTIONS_TTL"})
+    # Stale-while-revalidate: how long past its TTL an entry is still served
+    # while it reloads in the background; older entries are fetched inline
+    schools_stale_grace: float = field(default=7 * 24 * 60 * 60, metadata={"env": "SCHOOLS_STALE_GRACE"})
+    query_stale_grace: float = field(default=60 * 60, metadata={"env": "QUERY_STALE_GRACE"})
+    course_metadata_stale_grace: float = field(default=7 * 24 * 60 * 60, metadata={"env": "COURSE_METADATA_STALE_GRACE"})
+    course_sections_stale_grace: float = field(default=60 * 60, metadata={"env": "COURSE_SECTIONS_STALE_GRACE"})
+    query_cache_max_entries: int = field(default=2048, metadata={"env": "QUERY_CACHE_MAX_ENTRIES"})
+    query_cache_max_bytes: int = field(default=64 * 1024 * 1024, metadata={"env": "QUERY_CACHE_MAX_BYTES"})
+    # Pooled upstream HTTP client; HTTP2 needs the optional h2 package (pip install "httpx[http2]")
+    http_max_connections: int = field(default=100, metadata={"env": "HTTP_MAX_CONNECTIONS"})
+    http_max_keepalive_connections: int = field(default=20, metadata={"env": "HTTP_MAX_KEEPALIVE_CONNECTIONS"})
+    http_keepalive_expiry: float = field(default=30.0, metadata={"env": "HTTP_KEEPALIVE_EXPIRY"})
+    http_timeout: float = field(default=30.0, metadata={"env": "HTTP_TIMEOUT"})
+    http_connect_timeout: float = field(default=10.0, metadata={"env": "HTTP_CONNECT_TIMEOUT"})
+    http2: bool = field(default=False, metadata={"env": "HTTP2"})
+    # Last parsed response per upstream request, kept to revalidate with ETag/Last-Modified or a content
+    # hash; the byte budget applies to the estimated size of the parsed values
+    response_cache_max_entries: int = field(default=4096, metadata={"env": "RESPONSE_CACHE_MAX_ENTRIES"})
+    response_cache_max_bytes: int = field(default=64 * 1024 * 1024, metadata={"env": "RESPONSE_CACHE_MAX_BYTES"})
+    # Upstream gate: adaptive (AIMD) in-flight limit, queue deadline and circuit breaker
+    upstream_initial_limit: int = field(default=16, metadata={"env": "UPSTREAM_INITIAL_LIMIT"})
+    upstream_min_limit: int = field(default=2, metadata={"env": "UPSTREAM_MIN_LIMIT"})
+    upstream_max_limit: int = field(default=64, metadata={"env": "UPSTREAM_MAX_LIMIT"})
+    upstream_latency_target: float = field(default=2.0, metadata={"env": "UPSTREAM_LATENCY_TARGET"})
+    upstream_queue_timeout: float = field(default=5.0, metadata={"env": "UPSTREAM_QUEUE_TIMEOUT"})
+    circuit_failure_threshold: int = field(default=5, metadata={"env": "CIRCUIT_FAILURE_THRESHOLD"})
+    circuit_open_seconds: float = field(default=30.0, metadata={"env": "CIRCUIT_OPEN_SECONDS"})
+    # "memory" keeps catalog caches in process only; "sqlite" adds a second
+    # tier shared across restarts and workers
+    cache_backend: str = field(default="memory", metadata={"env": "CACHE_BACKEND"})
+    cache_path: str = field(default="catalog_cache.sqlite3", metadata={"env": "CACHE_PATH"})
+    # Rows kept in the sqlite backend; the oldest are pruned about once a minute
+    cache_backend_max_entries: int = field(default=10_000, metadata={"env": "CACHE_BACKEND_MAX_ENTRIES"})
+    # Rendered get-course / search summary text; entries only go stale when the record is replaced
+    render_cache_max_entries: int = field(default=8192, metadata={"env": "RENDER_CACHE_MAX_ENTRIES"})
+    render_cache_max_bytes: int = field(default=32 * 1024 * 1024, metadata={"env": "RENDER_CACHE_MAX_BYTES"})
+    batch_concurrency: int = field(default=8, metadata={"env": "BATCH_CONCURRENCY"})
+    # "live" queries ExploreCourses for search-courses; "snapshot" answers from the local index
+    catalog_source: str = field(default="live", metadata={"env": "CATALOG_SOURCE"})
+    snapshot_path: str = field(default="catalog_snapshot.json.gz", metadata={"env": "SNAPSHOT_PATH"})
+    snapshot_concurrency: int = field(default=4, metadata={"env": "SNAPSHOT_CONCURRENCY"})
+    # Incremental snapshot sync while serving: every department re-checked once per interval (0 disables)
+    snapshot_sync_interval: float = field(default=24 * 60 * 60, metadata={"env": "SNAPSHOT_SYNC_INTERVAL"})
+    # Startup warm-up; /healthz answers 503 until it finishes. WARMUP_QUERIES_PATH is a
+    # JSON-lines file of search-courses arguments, each with an optional popularity "count"
+    warmup_enabled: bool = field(default=True, metadata={"env": "WARMUP_ENABLED"})
+    warmup_queries_path: str = field(default="", metadata={"env": "WARMUP_QUERIES_PATH"})
+    warmup_top_queries: int = field(default=50, metadata={"env": "WARMUP_TOP_QUERIES"})
+    warmup_courses_per_query: int = field(default=5, metadata={"env": "WARMUP_COURSES_PER_QUERY"})
+    warmup_concurrency: int = field(default=4, metadata={"env": "WARMUP_CONCURRENCY"})
+    warmup_timeout: float = field(default=60.0, metadata={"env": "WARMUP_TIMEOUT"})
+
+
+SETTINGS = CatalogSettings()
+
+
+def load_settings(config: Config) -> CatalogSettings:
+    """Populate the process-wide SETTINGS from a starlette Config (e.g. .env)."""
+
+    # Cast to the declared type: float fields may have int defaults (6 * 60 * 60)
+    types = get_type_hints(CatalogSettings)
+    for f in fields(CatalogSettings):
+        setattr(SETTINGS, f.name, config(f.metadata["env"], cast=types[f.name], default=f.default))
+    if SETTINGS.cache_backend not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown CACHE_BACKEND {SETTINGS.cache_backend!r}; expected one of {', '.join(CACHE_BACKENDS)}")
+    return SETTINGS
@@ -0,0 +1,196 @@
+import asyncio
+import gzip
+import hashlib
+import heapq
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Collection, Dict, Iterator, Optional, Set, Tuple
+
+from .client import get_course_connection
+from .index import COURSE_INDEX, SearchIndex
+from .parsing import parse_courses
+from .records import CourseRecord, clear_shared
+
+logger = logging.getLogger(__name__)
+
+# Version 2 is JSON lines: a header, then one line per department in code order
+SNAPSHOT_VERSION = 2
+
+
+def department_digest(xml: bytes) -> bytes:
+    return hashlib.blake2b(xml, digest_size=16).digest()
+
+
+@dataclass
+class CatalogSnapshot:
+    """Raw ExploreCourses search XML for every department in one academic year.
+
+    The XML is kept verbatim (and gzip-compressed on disk) so a snapshot parses
+    into exactly the same course records a live query would return. Only a
+    digest per department stays in memory: saved XML is streamed back from
+    `path` when needed, and XML changed since the last save waits in `pending`
+    (None marks a dropped department).
+    """
+
+    year: str
+    created_at: float = field(default_factory=time.time)
+    path: Optional[str] = None
+    digests: Dict[str, bytes] = field(default_factory=dict)
+    pending: Dict[str, Optional[bytes]] = field(default_factory=dict)
+
+    def set_department(self, code: str, xml: bytes) -> None:
+        self.digests[code] = department_digest(xml)
+        self.pending[code] = xml
+
+    def drop_department(self, code: str) -> None:
+        self.digests.pop(code, None)
+        self.pending[code] = None
+
+    def departments(self) -> Iterator[Tuple[str, bytes]]:
+        """Yield ``(code, xml)`` for every department in code order, one at a time."""
+
+        saved: Iterator[Tuple[str, bytes]] = iter(())
+        if self.path is not None:
+            saved = (item for item in read_departments(self.path) if item[0] not in self.pending)
+        pending = sorted((code, xml) for code, xml in self.pending.items() if xml is not None)
+        return heapq.merge(saved, pending, key=lambda item: item[0])
+
+    def courses_by_department(self) -> Iterator[Tuple[str, CourseRecord]]:
+        """Yield ``(department code, course)`` for every listing, cross-listed courses once per department."""
+
+        for code, xml in self.departments():
+            for course in parse_courses(xml):
+                yield code, course
+
+    def courses(self) -> Iterator[CourseRecord]:
+        """Yield each course once, even when it is cross-listed in several departments."""
+
+        seen = set()
+        for _, course in self.courses_by_department():
+            if course.course_id not in seen:
+                seen.add(course.course_id)
+                yield course
+
+
+async def download_snapshot(year: str, concurrency: int = 4) -> CatalogSnapshot:
+    """Bulk-download a year's catalog, one request per department code from get_schools."""
+
+    api = get_course_connection()
+    schools = await api.get_schools(year)
+    codes = sorted({d.code for s in schools for d in s.departments})
+    snapshot = CatalogSnapshot(year=year)
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(code: str) -> None:
+        async with sem:
+            snapshot.set_department(code, await api.get_department_xml(code, year=year))
+            logger.info("Snapshot: fetched %s (%d/%d)", code, len(snapshot.digests), len(codes))
+
+    await asyncio.gather(*(fetch(code) for code in codes))
+    return snapshot
+
+
+def save_snapshot(snapshot: CatalogSnapshot, path: str) -> None:
+    """Write the snapshot as gzip-compressed JSON lines, atomically replacing
+    `path`, then make `path` its saved copy."""
+
+    header = {"version": SNAPSHOT_VERSION, "year": snapshot.year, "created_at": snapshot.created_at}
+    tmp = f"{path}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+        fh.write(json.dumps(header, separators=(",", ":")) + "\n")
+        for code, xml in snapshot.departments():
+            fh.write(json.dumps({"code": code, "xml": xml.decode("utf-8")}, separators=(",", ":")) + "\n")
+    os.replace(tmp, path)
+    snapshot.path = path
+    snapshot.pending.clear()
+
+
+def _read_header(fh, path: str) -> dict:
+    header = json.loads(fh.readline())
+    # Version 1 files are a single JSON object holding every department
+    if header.get("version") not in (1, SNAPSHOT_VERSION):
+        raise ValueError(f"Unsupported snapshot version {header.get('version')!r} in {path}")
+    return header
+
+
+def read_departments(path: str, codes: Optional[Collection[str]] = None) -> Iterator[Tuple[str, bytes]]:
+    """Yield ``(code, xml)`` for each department saved at `path` (only those in
+    `codes` when given), in code order."""
+
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        header = _read_header(fh, path)
+        if header["version"] == 1:
+            entries = ({"code": code, "xml": header["departments"][code]} for code in sorted(header["departments"]))
+        else:
+            entries = (json.loads(line) for line in fh)
+        for entry in entries:
+            if codes is None or entry["code"] in codes:
+                yield entry["code"], entry["xml"].encode("utf-8")
+
+
+def load_snapshot(path: str) -> CatalogSnapshot:
+    """Open the snapshot saved at `path`, reading only each department's digest into memory."""
+
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        header = _read_header(fh, path)
+    snapshot = CatalogSnapshot(year=header["year"], created_at=header["created_at"], path=path)
+    for code, xml in read_departments(path):
+        snapshot.digests[code] = department_digest(xml)
+    return snapshot
+
+
+# Active snapshot, the search index built from it and the course ids each of
+# its departments lists (all None when serving live)
+_snapshot: Optional[CatalogSnapshot] = None
+_search_index: Optional[SearchIndex] = None
+_members: Optional[Dict[str, Set[int]]] = None
+
+
+def use_snapshot(snapshot: CatalogSnapshot) -> SearchIndex:
+    """Build a SearchIndex from `snapshot`, make it the process-wide index and
+    register its courses in COURSE_INDEX."""
+
+    global _snapshot, _search_index, _members
+    started = time.perf_counter()
+    clear_shared(snapshot.year)
+    index = SearchIndex()
+    members: Dict[str, Set[int]] = {code: set() for code in snapshot.digests}
+    for code, course in snapshot.courses_by_department():
+        members[code].add(course.course_id)
+        if course.course_id not in index:
+            index.add(course)
+    _snapshot, _search_index, _members = snapshot, index, members
+    COURSE_INDEX.add_all(snapshot.year, _search_index.courses(), persist=False, sections_stored_at=snapshot.created_at)
+    logger.info(
+        "Indexed %d courses from %d departments (%s) in %.2fs",
+        len(_search_index), len(snapshot.digests), snapshot.year, time.perf_counter() - started,
+    )
+    return _search_index
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    return _search_index
+
+
+def get_active_snapshot() -> Optional[CatalogSnapshot]:
+    return _snapshot
+
+
+def get_department_members() -> Optional[Dict[str, Set[int]]]:
+    return _members
+
+
+async def refresh_snapshot(path: str, year: str, concurrency: int = 4) -> CatalogSnapshot:
+    """Download a fresh snapshot and persist it to `path`."""
+
+    started = time.perf_counter()
+    snapshot = await download_snapshot(year, concurrency=concurrency)
+    save_snapshot(snapshot, path)
+    logger.info(
+        "Saved snapshot of %d departments to %s in %.1fs",
+        len(snapshot.digests), path, time.perf_counter() - started,
+    )
+    return snapshot
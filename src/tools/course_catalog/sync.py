@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from metrics import counter
+from .client import get_course_connection
+from .index import COURSE_INDEX, SearchIndex
+from .parsing import parse_courses
+from .records import CourseRecord
+from .settings import SETTINGS
+from .snapshot import (
+    CatalogSnapshot,
+    department_digest,
+    get_active_snapshot,
+    get_department_members,
+    get_search_index,
+    load_snapshot,
+    read_departments,
+    save_snapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+# How often non-syncing prefork workers check the snapshot file for changes
+FOLLOW_POLL_SECONDS = 60.0
+
+# Largest share of known departments one schools listing may drop; a listing
+# dropping more (or listing none) is treated as an upstream error
+MAX_DROPPED_DEPARTMENTS = 0.1
+
+SYNC_DEPARTMENTS = counter(
+    "catalog_sync_departments_total", "Departments checked by the snapshot sync, by outcome.", ["outcome"]
+)
+SYNC_COURSES = counter("catalog_sync_courses_total", "Course changes applied by the snapshot sync, by change.", ["change"])
+
+
+@dataclass
+class SyncReport:
+    """What one sync pass checked and changed."""
+
+    year: str
+    checked: int = 0
+    changed_departments: List[str] = field(default_factory=list)
+    failed_departments: List[str] = field(default_factory=list)
+    added: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    modified: List[int] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def summary(self) -> str:
+        return (
+            f"{self.checked} departments checked, {len(self.changed_departments)} changed, "
+            f"{len(self.failed_departments)} failed; courses +{len(self.added)} "
+            f"-{len(self.removed)} ~{len(self.modified)} in {self.seconds:.1f}s"
+        )
+
+
+class CatalogSync:
+    """Incrementally keeps a loaded snapshot, its SearchIndex and COURSE_INDEX current.
+
+    Every department's XML is hashed. A re-fetched department with the same
+    hash is skipped; a changed one is parsed and diffed against what it listed
+    before, and only added and modified courses are re-indexed. A course is
+    removed once no department lists it any more, so cross-listed courses
+    survive being dropped by one of their departments.
+
+    A department response that is not catalog XML or lists no courses counts
+    as a failed department and leaves its courses in place.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, index: SearchIndex, members: Dict[str, Set[int]]):
+        self.snapshot = snapshot
+        self.index = index
+        self._members = members
+        # Number of departments listing each course
+        self._listings: Dict[int, int] = {}
+        for ids in members.values():
+            for course_id in ids:
+                self._listings[course_id] = self._listings.get(course_id, 0) + 1
+
+    def _apply(self, code: str, xml: Optional[bytes], courses: List[CourseRecord], report: SyncReport) -> None:
+        """Replace department `code` with `courses` parsed from `xml` (None drops the department)."""
+
+        old_ids = self._members.get(code, set())
+        new = {c.course_id: c for c in courses}
+        added, modified, changed = [], [], []
+        for course_id, course in new.items():
+            current = self.index.get(course_id)
+            if current is None:
+                added.append(course_id)
+                changed.append(course)
+            elif current != course:
+                modified.append(course_id)
+                changed.append(course)
+            if course_id not in old_ids:
+                self._listings[course_id] = self._listings.get(course_id, 0) + 1
+
+        removed = []
+        for course_id in old_ids - new.keys():
+            remaining = self._listings.get(course_id, 1) - 1
+            if remaining > 0:
+                self._listings[course_id] = remaining
+                continue
+            self._listings.pop(course_id, None)
+            self.index.remove(course_id)
+            removed.append(course_id)
+        report.added.extend(added)
+        report.removed.extend(removed)
+        report.modified.extend(modified)
+
+        for course in changed:
+            self.index.add(course)
+        COURSE_INDEX.add_all(self.snapshot.year, changed, persist=False)
+        COURSE_INDEX.discard(self.snapshot.year, removed)
+
+        if xml is None:
+            self.snapshot.drop_department(code)
+            self._members.pop(code, None)
+        else:
+            self.snapshot.set_department(code, xml)
+            self._members[code] = set(new)
+        report.changed_departments.append(code)
+        SYNC_DEPARTMENTS.inc("changed")
+        SYNC_COURSES.inc("added", amount=len(added))
+        SYNC_COURSES.inc("removed", amount=len(removed))
+        SYNC_COURSES.inc("modified", amount=len(modified))
+
+    def _failed(self, code: str, exc: Exception, report: SyncReport) -> None:
+        report.failed_departments.append(code)
+        SYNC_DEPARTMENTS.inc("failed")
+        logger.warning("Sync of department %s failed: %s", code, exc)
+
+    async def _update(self, code: str, xml: bytes, report: SyncReport) -> None:
+        """Apply department `code` from `xml`; a body that does not parse or
+        lists no courses is counted as failed and changes nothing."""
+
+        try:
+            if self.snapshot.digests.get(code) == department_digest(xml):
+                SYNC_DEPARTMENTS.inc("unchanged")
+                return
+            courses = await asyncio.to_thread(parse_courses, xml)
+            if not courses:
+                raise ValueError("response lists no courses")
+        except Exception as exc:
+            self._failed(code, exc, report)
+            return
+        self._apply(code, xml, courses, report)
+
+    async def sync_department(self, code: str, report: SyncReport) -> None:
+        """Re-fetch one department from ExploreCourses and apply it if its content changed."""
+
+        report.checked += 1
+        try:
+            xml = await get_course_connection().get_department_xml(code, year=self.snapshot.year)
+        except Exception as exc:
+            self._failed(code, exc, report)
+            return
+        await self._update(code, xml, report)
+
+    async def _department_codes(self, report: SyncReport) -> List[str]:
+        """Current department codes; departments no longer listed are dropped.
+
+        An empty listing, or one that would drop more than
+        MAX_DROPPED_DEPARTMENTS of the known departments, drops nothing and
+        the known departments are re-checked along with the listed ones.
+        """
+
+        schools = await get_course_connection().get_schools(self.snapshot.year)
+        codes = {d.code for s in schools for d in s.departments}
+        known = set(self.snapshot.digests)
+        dropped = known - codes
+        if not codes or len(dropped) > MAX_DROPPED_DEPARTMENTS * len(known):
+            logger.warning(
+                "Schools listing has %d departments and would drop %d of %d known ones; not dropping any",
+                len(codes), len(dropped), len(known),
+            )
+            return sorted(codes | known)
+        for code in sorted(dropped):
+            self._apply(code, None, [], report)
+        return sorted(codes)
+
+    async def sync_all(self, concurrency: int = 4) -> SyncReport:
+        """Check every department once, `concurrency` at a time."""
+
+        report = SyncReport(self.snapshot.year)
+        started = time.perf_counter()
+        codes = await self._department_codes(report)
+        sem = asyncio.Semaphore(max(1, concurrency))
+
+        async def sync(code: str) -> None:
+            async with sem:
+                await self.sync_department(code, report)
+
+        await asyncio.gather(*(sync(code) for code in codes))
+        report.seconds = time.perf_counter() - started
+        return report
+
+    async def run(self, interval: float, path: str) -> None:
+        """Check every department once per `interval`, spread evenly across it,
+        saving the snapshot to `path` after each pass that changed something."""
+
+        while True:
+            report = SyncReport(self.snapshot.year)
+            started = time.monotonic()
+            try:
+                codes = await self._department_codes(report)
+            except Exception as exc:
+                logger.warning("Sync could not list departments: %s", exc)
+                await asyncio.sleep(min(interval, 300.0))
+                continue
+            step = interval / max(1, len(codes))
+            for i, code in enumerate(codes):
+                await self.sync_department(code, report)
+                await asyncio.sleep(max(0.0, started + (i + 1) * step - time.monotonic()))
+            report.seconds = time.monotonic() - started
+            logger.info("Snapshot sync pass: %s", report.summary())
+            if report.changed_departments:
+                await asyncio.to_thread(save_snapshot, self.snapshot, path)
+
+    async def follow(self, path: str, poll: float = FOLLOW_POLL_SECONDS) -> None:
+        """Apply the departments that changed in the snapshot file at `path`
+        whenever another worker rewrites it, without calling ExploreCourses."""
+
+        mtime = os.stat(path).st_mtime
+        while True:
+            await asyncio.sleep(poll)
+            try:
+                current = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if current == mtime:
+                continue
+            mtime = current
+            saved = await asyncio.to_thread(load_snapshot, path)
+            report = SyncReport(self.snapshot.year, checked=len(saved.digests))
+            started = time.perf_counter()
+            for code in sorted(set(self.snapshot.digests) - set(saved.digests)):
+                self._apply(code, None, [], report)
+            changed = {code for code, digest in saved.digests.items() if self.snapshot.digests.get(code) != digest}
+            for code, xml in await asyncio.to_thread(list, read_departments(path, changed)):
+                await self._update(code, xml, report)
+            # The file already holds everything just applied
+            self.snapshot.path = path
+            self.snapshot.pending.clear()
+            report.seconds = time.perf_counter() - started
+            logger.info("Applied snapshot changes from %s: %s", path, report.summary())
+
+
+def create_sync() -> Optional[CatalogSync]:
+    """A CatalogSync over the active snapshot, or None when serving live."""
+
+    snapshot, index, members = get_active_snapshot(), get_search_index(), get_department_members()
+    if snapshot is None or index is None or members is None:
+        return None
+    return CatalogSync(snapshot, index, members)
+
+
+async def run_snapshot_sync(worker_slot: int) -> None:
+    """Keep the active snapshot current: worker 0 syncs from ExploreCourses and
+    saves SNAPSHOT_PATH, other prefork workers follow that file."""
+
+    sync = create_sync()
+    if sync is None:
+        return
+    if worker_slot == 0:
+        await sync.run(SETTINGS.snapshot_sync_interval, SETTINGS.snapshot_path)
+    else:
+        await sync.follow(SETTINGS.snapshot_path)
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List
+
+from .formatting import format_course_summary
+from .render import RENDER_CACHE
+from .settings import SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# The tool and filter modules (and with them mcp and explorecourses) are
+# imported inside the warm-up coroutines, so app.py can read WARMUP_STATUS
+# without putting them on the startup path.
+
+
+@dataclass
+class WarmupStatus:
+    """Progress of the startup warm-up, reported by /healthz."""
+
+    state: str = "pending"  # pending | warming | ready
+    schools: int = 0
+    departments: int = 0
+    queries: int = 0
+    courses: int = 0
+    failures: int = 0
+    timed_out: bool = False
+    seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+WARMUP_STATUS = WarmupStatus()
+
+
+def load_warmup_queries(path: str, limit: int) -> List[Dict[str, Any]]:
+    """Read the `limit` most popular searches from a JSON-lines file.
+
+    Each line holds search-courses arguments (``{"query": "...", "terms":
+    [...]}`` plus any optional filters) and may carry a ``"count"``;
+    lines are ranked by count, then by file order.
+    """
+
+    entries = []
+    with open(path, encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning("Skipping malformed warm-up query on line %d of %s", lineno, path)
+                continue
+            if isinstance(entry, dict):
+                entries.append(entry)
+    entries.sort(key=lambda e: -e.get("count", 0))
+    return entries[:limit]
+
+
+async def _warm_query(arguments: Dict[str, Any], year: str) -> None:
+    from .course_catalog import DEFAULT_PAGE_SIZE, get_course, search_courses
+    from .filtering import build_filters_from_arguments, term_filters
+
+    fs = build_filters_from_arguments(arguments, term_field="terms", require_terms=True)
+    courses = await search_courses(arguments.get("query", ""), fs, year)
+    WARMUP_STATUS.queries += 1
+
+    # First page as search-courses renders it, then full records for the top hits
+    terms = term_filters(fs)
+    for c in courses[:DEFAULT_PAGE_SIZE]:
+        RENDER_CACHE.render(c, year, terms, "summary", format_course_summary)
+    for c in courses[:SETTINGS.warmup_courses_per_query]:
+        await get_course(c.course_id, [], year)
+        WARMUP_STATUS.courses += 1
+
+
+async def _run(year: str) -> None:
+    from .course_catalog import get_schools
+
+    schools = await get_schools(year)
+    WARMUP_STATUS.schools = len(schools)
+    WARMUP_STATUS.departments = sum(len(s.departments) for s in schools)
+
+    queries: List[Dict[str, Any]] = []
+    if SETTINGS.warmup_queries_path:
+        queries = load_warmup_queries(SETTINGS.warmup_queries_path, SETTINGS.warmup_top_queries)
+    sem = asyncio.Semaphore(max(1, SETTINGS.warmup_concurrency))
+
+    async def warm(arguments: Dict[str, Any]) -> None:
+        async with sem:
+            try:
+                await _warm_query(arguments, year)
+            except Exception as exc:
+                WARMUP_STATUS.failures += 1
+                logger.warning("Warm-up query %r failed: %s", arguments.get("query"), exc)
+
+    await asyncio.gather(*(warm(q) for q in queries))
+
+
+async def warm_up(year: str) -> WarmupStatus:
+    """Preload schools, departments, popular searches and the courses they
+    reference, within WARMUP_TIMEOUT. The process reports ready when this
+    returns, however far it got."""
+
+    if not SETTINGS.warmup_enabled:
+        WARMUP_STATUS.state = "ready"
+        return WARMUP_STATUS
+
+    WARMUP_STATUS.state = "warming"
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(_run(year), SETTINGS.warmup_timeout)
+    except asyncio.TimeoutError:
+        WARMUP_STATUS.timed_out = True
+        logger.warning("Warm-up stopped after its %gs budget", SETTINGS.warmup_timeout)
+    except Exception:
+        WARMUP_STATUS.failures += 1
+        logger.warning("Warm-up failed; starting cold", exc_info=True)
+    finally:
+        WARMUP_STATUS.seconds = round(time.perf_counter() - started, 3)
+        WARMUP_STATUS.state = "ready"
+
+    logger.info(
+        "Warm-up done in %.2fs: %d schools, %d departments, %d queries, %d courses, %d failures",
+        WARMUP_STATUS.seconds, WARMUP_STATUS.schools, WARMUP_STATUS.departments,
+        WARMUP_STATUS.queries, WARMUP_STATUS.courses, WARMUP_STATUS.failures,
+    )
+    return WARMUP_STATUS
@@ -1,26 +1,64 @@
-from typing import Any, Awaitable, Callable, Dict, List
+import importlib
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List
 
-import mcp.types as types
+import tracing
+from metrics import TOOL_CALLS, TOOL_ERRORS, TOOL_LATENCY, TOOL_RESPONSE_BYTES
 
-ToolHandler = Callable[[Dict[str, Any], Any], Awaitable[List[types.ContentBlock]]]
+if TYPE_CHECKING:
+    import mcp.types as types
 
-_TOOL_SPECS: Dict[str, types.Tool] = {}
+ToolHandler = Callable[[Dict[str, Any], Any], Awaitable[List["types.ContentBlock"]]]
+
+_TOOL_SPECS: Dict[str, "types.Tool"] = {}
 _TOOL_HANDLERS: Dict[str, ToolHandler] = {}
 
+# Tool modules queued by register_module, imported on first list or dispatch
+_PENDING_MODULES: List[str] = []
+
 
-def register_tool(spec: types.Tool, handler: ToolHandler) -> None:
+def register_tool(spec: "types.Tool", handler: ToolHandler) -> None:
     _TOOL_SPECS[spec.name] = spec
     _TOOL_HANDLERS[spec.name] = handler
 
 
-def list_all_tools() -> List[types.Tool]:
+def register_module(module: str) -> None:
+    """Queue a tool module exposing ``register_all()`` without importing it yet."""
+
+    _PENDING_MODULES.append(module)
+
+
+def load_tools() -> None:
+    """Import every queued tool module and register its tools."""
+
+    while _PENDING_MODULES:
+        importlib.import_module(_PENDING_MODULES.pop(0)).register_all()
+
+
+def list_all_tools() -> List["types.Tool"]:
+    load_tools()
     return list(_TOOL_SPECS.values())
 
 
-async def dispatch(name: str, arguments: Dict[str, Any], ctx: Any) -> List[types.ContentBlock]:
+async def dispatch(name: str, arguments: Dict[str, Any], ctx: Any) -> List["types.ContentBlock"]:
+    if name not in _TOOL_HANDLERS:
+        load_tools()
     if name not in _TOOL_HANDLERS:
         raise ValueError(f"Unknown tool: {name}")
     handler = _TOOL_HANDLERS[name]
-    return await handler(arguments, ctx)
+    TOOL_CALLS.inc(name)
+    started = time.perf_counter()
+    with tracing.trace("dispatch", tool=name) as root:
+        try:
+            blocks = await handler(arguments, ctx)
+        except Exception:
+            TOOL_ERRORS.inc(name)
+            raise
+        finally:
+            TOOL_LATENCY.observe(time.perf_counter() - started, name)
+        size = sum(len(getattr(b, "text", "").encode("utf-8")) for b in blocks)
+        TOOL_RESPONSE_BYTES.observe(size, name)
+        root.set("response_bytes", size)
+    return blocks
 
 
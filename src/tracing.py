@@ -0,0 +1,136 @@
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+# Opt-in request tracing.
+#
+# `trace()` opens a root span per tool call (sampled at the configured rate)
+# and `span()` records nested stages inside it. Unsampled calls and calls made
+# while tracing is off get a shared no-op span and pay one ContextVar lookup
+# per stage. A finished trace is appended to the trace file as JSON lines,
+# one span per line, using OpenTelemetry field names. Every trace is a single
+# write to a file opened with O_APPEND, so pre-forked workers can share one
+# file.
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+class _NoopSpan:
+    """Stand-in yielded outside a sampled trace, so call sites can always `.set()`."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+
+
+# (trace, innermost open span) for the running request, if it is sampled
+_active: ContextVar[Optional[tuple]] = ContextVar("trace_active", default=None)
+
+_fd: Optional[int] = None
+_sample_rate = 1.0
+
+
+def configure(path: Optional[str], sample_rate: float = 1.0) -> None:
+    """Enable tracing to `path` (JSON lines), or disable it when `path` is None."""
+
+    global _fd, _sample_rate
+    if _fd is not None:
+        os.close(_fd)
+        _fd = None
+    if path:
+        _fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    _sample_rate = min(1.0, max(0.0, sample_rate))
+
+
+@contextmanager
+def trace(name: str, **attributes: Any) -> Iterator[Union[Span, _NoopSpan]]:
+    """Root span for one request; a no-op when tracing is off or the request is not sampled."""
+
+    if _fd is None or _active.get() is not None or random.random() >= _sample_rate:
+        yield _NOOP
+        return
+    tr = _Trace()
+    root = Span(name, None, attributes)
+    token = _active.set((tr, root))
+    try:
+        yield root
+    except BaseException as exc:
+        root.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        root.end_ns = time.time_ns()
+        _active.reset(token)
+        tr.spans.append(root)
+        _write(tr)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Union[Span, _NoopSpan]]:
+    """Nested stage of the current trace; a no-op outside a sampled trace."""
+
+    active = _active.get()
+    if active is None:
+        yield _NOOP
+        return
+    tr, parent = active
+    current = Span(name, parent.span_id, attributes)
+    token = _active.set((tr, current))
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _active.reset(token)
+        tr.spans.append(current)
+
+
+def _write(tr: _Trace) -> None:
+    fd = _fd
+    if fd is None:
+        return
+    lines = []
+    for s in tr.spans:
+        lines.append(json.dumps({
+            "trace_id": tr.trace_id,
+            "span_id": s.span_id,
+            "parent_span_id": s.parent_id,
+            "name": s.name,
+            "start_time_unix_nano": s.start_ns,
+            "end_time_unix_nano": s.end_ns,
+            "duration_ms": round((s.end_ns - s.start_ns) / 1e6, 3),
+            "status": {"code": "ERROR", "message": s.error} if s.error else {"code": "OK"},
+            "attributes": s.attributes,
+        }, default=str))
+    os.write(fd, ("\n".join(lines) + "\n").encode("utf-8"))
@@ -0,0 +1,108 @@
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+# Index of this process among the prefork workers (0 when not pre-forked)
+_worker_slot = 0
+
+
+def current_worker_slot() -> int:
+    return _worker_slot
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app: Any, sock: socket.socket, log_level: str, slot: int) -> None:
+    global _worker_slot
+    _worker_slot = slot
+    # Restore default handlers; uvicorn installs its own graceful-shutdown ones
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def serve_prefork(app: Any, host: str, port: int, workers: int, log_level: str) -> None:
+    """Serve `app` from `workers` forked processes sharing one listening socket.
+
+    Everything loaded before this call (e.g. the snapshot search index) is
+    inherited copy-on-write by every worker instead of being rebuilt per
+    process. The heap is frozen out of the cyclic GC first, so collections in
+    the workers don't touch (and thereby un-share) those pages. Per-process
+    resources such as the HTTP client and cache backend are created lazily
+    inside each worker. Workers that die unexpectedly are restarted.
+    """
+
+    if not hasattr(os, "fork"):
+        raise RuntimeError("--workers requires a platform with os.fork()")
+
+    sock = _bind_socket(host, port)
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                _run_worker(app, sock, log_level, slot)
+                code = 0
+            except BaseException:
+                logger.exception("Worker %d crashed", slot)
+            finally:
+                os._exit(code)
+        children[pid] = slot
+        logger.info("Started worker %d (pid %d)", slot, pid)
+
+    def stop(signum: int, frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info("Serving on %s:%d with %d workers", host, port, workers)
+    for slot in range(workers):
+        spawn(slot)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is None:
+            continue
+        if not stopping:
+            code = os.waitstatus_to_exitcode(status)
+            logger.warning("Worker %d (pid %d) exited with status %d; restarting", slot, pid, code)
+            time.sleep(1)
+            spawn(slot)
+
+    sock.close()
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from tools.course_catalog.cache import LRUCache, RefreshingCache
+
+
+class Loader:
+    """Async loader returning successive values, or raising once `fail` is set."""
+
+    def __init__(self, *values):
+        self.values = list(values)
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return self.values.pop(0)
+
+
+async def _settle():
+    # Let background revalidation tasks run
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_refreshing_cache_serves_fresh_entries_without_loading():
+    async def main():
+        cache = RefreshingCache(ttl=lambda: 60.0)
+        load = Loader("a")
+        assert await cache.get("k", load) == "a"
+        assert await cache.get("k", load) == "a"
+        assert load.calls == 1
+
+    asyncio.run(main())
+
+
+def test_refreshing_cache_serves_stale_within_grace_and_revalidates():
+    async def main():
+        cache = RefreshingCache(ttl=lambda: 0.0, grace=lambda: 60.0)
+        load = Loader("a", "b")
+        assert await cache.get("k", load) == "a"
+        # Past ttl: the old value comes back at once, the reload runs behind it
+        assert await cache.get("k", load) == "a"
+        await _settle()
+        assert load.calls == 2
+        assert await cache.get("k", load) == "b"
+        assert cache.stale_hits == 2
+
+    asyncio.run(main())
+
+
+def test_refreshing_cache_keeps_value_when_revalidation_fails():
+    async def main():
+        cache = RefreshingCache(ttl=lambda: 0.0, grace=lambda: 60.0)
+        load = Loader("a")
+        assert await cache.get("k", load) == "a"
+        load.fail = True
+        assert await cache.get("k", load) == "a"
+        await _settle()
+        assert await cache.get("k", load) == "a"
+
+    asyncio.run(main())
+
+
+def test_refreshing_cache_falls_back_past_grace_when_loader_fails():
+    async def main():
+        cache = RefreshingCache(ttl=lambda: 0.0, grace=lambda: 0.0)
+        load = Loader("a")
+        assert await cache.get("k", load) == "a"
+        load.fail = True
+        assert await cache.get("k", load) == "a"
+        assert load.calls == 2
+
+    asyncio.run(main())
+
+
+def test_refreshing_cache_raises_without_old_entry():
+    async def main():
+        cache = RefreshingCache(ttl=lambda: 60.0)
+        load = Loader()
+        load.fail = True
+        with pytest.raises(RuntimeError):
+            await cache.get("k", load)
+
+    asyncio.run(main())
+
+
+def _lru(ttl=60.0, grace=0.0, max_entries=10, max_bytes=1000, on_evict=None):
+    return LRUCache(
+        ttl=lambda: ttl,
+        max_entries=lambda: max_entries,
+        max_bytes=lambda: max_bytes,
+        sizeof=len,
+        grace=lambda: grace,
+        on_evict=on_evict,
+    )
+
+
+def test_lru_evicts_least_recently_used_by_count_and_bytes():
+    cache = _lru(max_entries=2, max_bytes=10)
+    cache.put("a", "xxx")
+    cache.put("b", "xxx")
+    assert cache.get("a") == "xxx"
+    cache.put("c", "xxx")
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxx"
+    cache.put("d", "xxxxxxxx")
+    assert len(cache) == 1 and cache.bytes == 8
+    assert cache.get("d") == "xxxxxxxx"
+
+
+def test_lru_reports_evicted_keys():
+    evicted = []
+    cache = _lru(max_entries=2, on_evict=evicted.append)
+    for key in "abc":
+        cache.put(key, "x")
+    assert evicted == ["a"]
+    assert "a" not in cache and "c" in cache
+
+
+def test_lru_skips_values_over_the_byte_budget():
+    cache = _lru(max_bytes=4)
+    cache.put("a", "xxxxx")
+    assert cache.get("a") is None and cache.bytes == 0
+
+
+def test_lru_expired_entries_are_misses_but_served_stale():
+    cache = _lru(ttl=0.0)
+    cache.put("a", "old")
+    assert cache.get("a") is None
+    assert asyncio.run(cache.get_stale("a")) == "old"
+
+
+def test_lru_revalidates_within_grace():
+    async def main():
+        cache = _lru(ttl=0.0, grace=60.0)
+        cache.put("a", "old")
+        load = Loader("new")
+        assert cache.get("a") is None
+        assert cache.get("a", revalidate=load) == "old"
+        await _settle()
+        assert load.calls == 1
+        assert await cache.get_stale("a") == "new"
+
+    asyncio.run(main())
@@ -0,0 +1,196 @@
+import asyncio
+
+import httpx
+import pytest
+
+from tools.course_catalog.gate import UpstreamGate, UpstreamUnavailable
+from tools.course_catalog.settings import SETTINGS
+
+
+@pytest.fixture(autouse=True)
+def gate_settings(monkeypatch):
+    monkeypatch.setattr(SETTINGS, "upstream_initial_limit", 2)
+    monkeypatch.setattr(SETTINGS, "upstream_min_limit", 1)
+    monkeypatch.setattr(SETTINGS, "upstream_queue_timeout", 0.05)
+    monkeypatch.setattr(SETTINGS, "circuit_failure_threshold", 3)
+    monkeypatch.setattr(SETTINGS, "circuit_open_seconds", 60.0)
+
+
+async def _fail(gate: UpstreamGate) -> None:
+    with pytest.raises(httpx.ConnectError):
+        async with gate.slot():
+            raise httpx.ConnectError("refused")
+
+
+async def _succeed(gate: UpstreamGate) -> None:
+    async with gate.slot():
+        pass
+
+
+def test_admits_up_to_limit_and_queues_the_rest():
+    async def main():
+        gate = UpstreamGate()
+        release = asyncio.Event()
+        entered = []
+
+        async def call(i):
+            async with gate.slot():
+                entered.append(i)
+                await release.wait()
+
+        tasks = [asyncio.create_task(call(i)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        assert entered == [0, 1]
+        assert gate.inflight == 2 and gate.queued == 1
+        release.set()
+        await asyncio.gather(*tasks)
+        assert entered == [0, 1, 2]
+        assert gate.inflight == 0 and gate.queued == 0
+
+    asyncio.run(main())
+
+
+def test_queue_deadline_raises_unavailable():
+    async def main():
+        gate = UpstreamGate()
+        release = asyncio.Event()
+
+        async def hold():
+            async with gate.slot():
+                await release.wait()
+
+        holders = [asyncio.create_task(hold()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(UpstreamUnavailable):
+            await _succeed(gate)
+        assert gate.timeouts == 1 and gate.queued == 0
+        release.set()
+        await asyncio.gather(*holders)
+        assert gate.inflight == 0
+
+    asyncio.run(main())
+
+
+def test_client_errors_do_not_count_as_failures():
+    async def main():
+        gate = UpstreamGate()
+        for _ in range(5):
+            with pytest.raises(ValueError):
+                async with gate.slot():
+                    raise ValueError("bad request")
+        assert gate.state == "closed"
+
+    asyncio.run(main())
+
+
+def test_circuit_opens_after_consecutive_failures():
+    async def main():
+        gate = UpstreamGate()
+        for _ in range(3):
+            await _fail(gate)
+        assert gate.state == "open"
+        with pytest.raises(UpstreamUnavailable):
+            await _succeed(gate)
+        assert gate.rejected == 1
+
+    asyncio.run(main())
+
+
+def test_success_resets_failure_count():
+    async def main():
+        gate = UpstreamGate()
+        await _fail(gate)
+        await _fail(gate)
+        await _succeed(gate)
+        await _fail(gate)
+        assert gate.state == "closed"
+
+    asyncio.run(main())
+
+
+def test_half_open_probe_closes_circuit(monkeypatch):
+    monkeypatch.setattr(SETTINGS, "circuit_open_seconds", 0.0)
+
+    async def main():
+        gate = UpstreamGate()
+        for _ in range(3):
+            await _fail(gate)
+        release = asyncio.Event()
+
+        async def probe():
+            async with gate.slot():
+                await release.wait()
+
+        task = asyncio.create_task(probe())
+        await asyncio.sleep(0.01)
+        assert gate.state == "half_open"
+        # Only the probe is let through while it is in flight
+        with pytest.raises(UpstreamUnavailable):
+            await _succeed(gate)
+        release.set()
+        await task
+        assert gate.state == "closed"
+        await _succeed(gate)
+
+    asyncio.run(main())
+
+
+def test_failed_probe_reopens_circuit(monkeypatch):
+    monkeypatch.setattr(SETTINGS, "circuit_open_seconds", 0.0)
+
+    async def main():
+        gate = UpstreamGate()
+        for _ in range(3):
+            await _fail(gate)
+        monkeypatch.setattr(SETTINGS, "circuit_open_seconds", 60.0)
+        await _fail(gate)
+        assert gate.state == "open"
+        with pytest.raises(UpstreamUnavailable):
+            await _succeed(gate)
+
+    asyncio.run(main())
+
+
+def test_requests_admitted_before_the_trip_do_not_decide_the_probe(monkeypatch):
+    monkeypatch.setattr(SETTINGS, "upstream_initial_limit", 8)
+    monkeypatch.setattr(SETTINGS, "circuit_open_seconds", 0.0)
+
+    async def main():
+        gate = UpstreamGate()
+        events = {name: asyncio.Event() for name in ("early_done", "probe_done")}
+
+        async def early():
+            async with gate.slot():
+                await events["early_done"].wait()
+
+        async def probe():
+            async with gate.slot():
+                await events["probe_done"].wait()
+                raise httpx.ConnectError("refused")
+
+        finishing = asyncio.create_task(early())
+        cancelled = asyncio.create_task(early())
+        await asyncio.sleep(0.01)
+        for _ in range(3):
+            await _fail(gate)
+        probing = asyncio.create_task(probe())
+        await asyncio.sleep(0.01)
+        assert gate.state == "half_open"
+
+        # A success or cancellation of a pre-trip request neither closes the
+        # circuit nor lets a second probe through
+        events["early_done"].set()
+        await finishing
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert gate.state == "half_open"
+        with pytest.raises(UpstreamUnavailable):
+            await _succeed(gate)
+
+        monkeypatch.setattr(SETTINGS, "circuit_open_seconds", 60.0)
+        events["probe_done"].set()
+        with pytest.raises(httpx.ConnectError):
+            await probing
+        assert gate.state == "open"
+
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+import asyncio
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from tools.course_catalog import course_catalog
+
+
+def summaries(*ids: int) -> list:
+    return [
+        SimpleNamespace(
+            course_id=i, year="2025-2026", subject="CS", code=str(i), title=f"Course {i}", description="",
+            units_min=3, units_max=3,
+        )
+        for i in ids
+    ]
+
+
+@pytest.fixture
+def results(monkeypatch):
+    current = {"courses": summaries(*range(1, 6))}
+
+    async def fake_search(query, fs, year=course_catalog.ACADEMIC_YEAR):
+        return current["courses"]
+
+    monkeypatch.setattr(course_catalog, "search_courses", fake_search)
+    return current
+
+
+def search(**arguments) -> str:
+    arguments = {"query": "course", "terms": ["Autumn"], **arguments}
+    return asyncio.run(course_catalog.search_courses_handler(arguments, None))[0].text
+
+
+def next_cursor(text: str) -> str:
+    return re.search(r'cursor="([^"]+)"', text).group(1)
+
+
+def test_pages_follow_the_cursor(results):
+    first = search(limit=2)
+    assert "Results 1-2 of 5" in first
+    second = search(limit=2, cursor=next_cursor(first))
+    assert "Results 3-4 of 5" in second
+    last = search(limit=2, cursor=next_cursor(second))
+    assert "Results 5-5 of 5" in last
+    assert "More results available" not in last
+
+
+def test_cursor_rejected_for_another_search(results):
+    cursor = next_cursor(search(limit=2))
+    with pytest.raises(ValueError, match="different search"):
+        search(limit=2, cursor=cursor, query="other")
+
+
+def test_cursor_rejected_when_results_changed(results):
+    cursor = next_cursor(search(limit=2))
+    results["courses"] = summaries(9, *range(1, 6))
+    with pytest.raises(ValueError, match="changed"):
+        search(limit=2, cursor=cursor)
+
+
+def test_malformed_cursor_rejected(results):
+    with pytest.raises(ValueError, match="Invalid 'cursor'"):
+        search(cursor="not-a-cursor")
@@ -0,0 +1,150 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from tools.course_catalog.index import COURSE_INDEX, SearchIndex
+from tools.course_catalog.snapshot import CatalogSnapshot, load_snapshot, read_departments, save_snapshot
+from tools.course_catalog import sync as sync_module
+from tools.course_catalog.sync import CatalogSync, SyncReport
+
+YEAR = "2099-2100"
+
+
+def course_xml(course_id: int, subject: str, code: str, title: str) -> str:
+    return (
+        f"<course><year>{YEAR}</year><subject>{subject}</subject><code>{code}</code>"
+        f"<title>{title}</title><description>About {title}.</description><gers></gers>"
+        "<repeatable>false</repeatable><grading>Letter</grading><unitsMin>3</unitsMin><unitsMax>4</unitsMax>"
+        "<learningObjectives></learningObjectives><sections></sections><tags></tags><attributes></attributes>"
+        f"<administrativeInformation><courseId>{course_id}</courseId><effectiveStatus>A</effectiveStatus>"
+        f"<offerNumber>1</offerNumber><academicGroup>ENGR</academicGroup><academicOrganization>{subject}</academicOrganization>"
+        "<academicCareer>UG</academicCareer><finalExamFlag>Y</finalExamFlag><maxUnitsRepeat>4</maxUnitsRepeat>"
+        "<maxTimesRepeat>1</maxTimesRepeat></administrativeInformation></course>"
+    )
+
+
+def department_xml(*courses: str) -> bytes:
+    return ('<?xml version="1.0" encoding="UTF-8"?><xml><courses>' + "".join(courses) + "</courses></xml>").encode()
+
+
+INTRO = course_xml(1, "CS", "106A", "Programming Methodology")
+SYSTEMS = course_xml(2, "CS", "110", "Principles of Computer Systems")
+CIRCUITS = course_xml(3, "EE", "101A", "Circuits")
+# CS 110 is cross-listed in EE
+DEPARTMENTS = {"CS": department_xml(INTRO, SYSTEMS), "EE": department_xml(CIRCUITS, SYSTEMS)}
+
+
+@pytest.fixture
+def sync():
+    snapshot = CatalogSnapshot(YEAR)
+    for code, xml in DEPARTMENTS.items():
+        snapshot.set_department(code, xml)
+    members = {}
+    index = SearchIndex()
+    for code, course in snapshot.courses_by_department():
+        members.setdefault(code, set()).add(course.course_id)
+        index.add(course)
+    yield CatalogSync(snapshot, index, members)
+    COURSE_INDEX.discard(YEAR, [1, 2, 3, 4])
+
+
+def update(sync: CatalogSync, code: str, xml: bytes) -> SyncReport:
+    report = SyncReport(YEAR)
+    asyncio.run(sync._update(code, xml, report))
+    return report
+
+
+def test_unchanged_department_is_skipped(sync):
+    before = sync.index.get(1)
+    report = update(sync, "CS", department_xml(INTRO, SYSTEMS))
+    assert report.changed_departments == []
+    assert sync.index.get(1) is before
+
+
+def test_added_course_is_indexed(sync):
+    report = update(sync, "CS", department_xml(INTRO, SYSTEMS, course_xml(4, "CS", "111", "Operating Systems")))
+    assert (report.added, report.removed, report.modified) == ([4], [], [])
+    assert [c.course_id for c in sync.index.search("operating")] == [4]
+    assert COURSE_INDEX.get(YEAR, 4).title == "Operating Systems"
+
+
+def test_removed_course_is_dropped(sync):
+    report = update(sync, "CS", department_xml(SYSTEMS))
+    assert (report.added, report.removed, report.modified) == ([], [1], [])
+    assert 1 not in sync.index
+    assert sync.index.search("methodology") == []
+
+
+def test_modified_course_is_reindexed(sync):
+    untouched = sync.index.get(2)
+    report = update(sync, "CS", department_xml(course_xml(1, "CS", "106A", "Programming Abstractions"), SYSTEMS))
+    assert (report.added, report.removed, report.modified) == ([], [], [1])
+    assert sync.index.get(1).title == "Programming Abstractions"
+    assert [c.course_id for c in sync.index.search("abstractions")] == [1]
+    assert sync.index.search("methodology") == []
+    assert sync.index.get(2) is untouched
+
+
+def test_cross_listed_course_survives_one_department_dropping_it(sync):
+    report = update(sync, "CS", department_xml(INTRO))
+    assert report.removed == []
+    assert 2 in sync.index
+    report = update(sync, "EE", department_xml(CIRCUITS))
+    assert report.removed == [2]
+    assert 2 not in sync.index
+
+
+@pytest.mark.parametrize("body", [b"<xml><courses><course>", b"<html>Service temporarily unavailable</html>", department_xml()])
+def test_unusable_department_body_fails_without_removing(sync, body):
+    report = update(sync, "CS", body)
+    assert report.failed_departments == ["CS"]
+    assert report.removed == [] and report.changed_departments == []
+    assert 1 in sync.index and 2 in sync.index
+
+
+class FakeConnection:
+    def __init__(self, departments, listed):
+        self.departments = departments
+        self.listed = listed
+
+    async def get_schools(self, year):
+        return [SimpleNamespace(departments=[SimpleNamespace(code=code) for code in self.listed])]
+
+    async def get_department_xml(self, code, year=None):
+        return self.departments[code]
+
+
+@pytest.mark.parametrize("listed", [[], ["CS"]])
+def test_suspicious_schools_listing_drops_no_department(sync, monkeypatch, listed):
+    connection = FakeConnection(DEPARTMENTS, listed)
+    monkeypatch.setattr(sync_module, "get_course_connection", lambda: connection)
+    report = asyncio.run(sync.sync_all())
+    assert report.removed == [] and report.failed_departments == []
+    assert report.checked == 2
+    assert set(sync.snapshot.digests) == {"CS", "EE"}
+    assert len(sync.index) == 3
+
+
+def test_malformed_department_does_not_stop_the_pass(sync, monkeypatch):
+    departments = {"CS": b"<xml><courses><course>", "EE": department_xml(CIRCUITS)}
+    monkeypatch.setattr(sync_module, "get_course_connection", lambda: FakeConnection(departments, ["CS", "EE"]))
+    report = asyncio.run(sync.sync_all())
+    assert report.failed_departments == ["CS"]
+    assert report.changed_departments == ["EE"]
+    # CS 110 is still listed by CS, so dropping it from EE keeps it
+    assert report.removed == [] and 2 in sync.index
+
+
+def test_save_streams_unchanged_departments_from_the_previous_file(sync, tmp_path):
+    path = str(tmp_path / "snapshot.json.gz")
+    save_snapshot(sync.snapshot, path)
+    assert sync.snapshot.pending == {}
+    renamed = department_xml(course_xml(1, "CS", "106A", "Programming Abstractions"), SYSTEMS)
+    update(sync, "CS", renamed)
+    assert list(sync.snapshot.pending) == ["CS"]
+    save_snapshot(sync.snapshot, path)
+    assert dict(read_departments(path)) == {"CS": renamed, "EE": DEPARTMENTS["EE"]}
+    loaded = load_snapshot(path)
+    assert loaded.digests == sync.snapshot.digests and loaded.pending == {}
+    assert [c.title for c in loaded.courses()] == ["Programming Abstractions", "Principles of Computer Systems", "Circuits"]